@@ -1,29 +1,71 @@
-from flask import Flask, render_template, jsonify, request
-from datetime import datetime
+from flask import Flask, Blueprint, render_template, jsonify, request, Response, g, abort, has_request_context, url_for
+from datetime import datetime, timedelta
+import hashlib
 import json
 import sqlite3
 import os
 
+import assets
+import backup
+import boards
+import maintenance
+import metrics
+from archive import auto_archive_tx
+from models import Task, ArchivedTask, Status, TASK_COLUMNS, PRIORITY_RANK_SQL, due_tasks_sql, normalize_due_date, parse_description, parse_status, parse_priority, parse_tags
+
 app = Flask(__name__)
+api = Blueprint('api', __name__)
+
+DATABASE = boards.DEFAULT_DATABASE
+ARCHIVE_PAGE_SIZE = 50
+MAX_ARCHIVE_PAGE_SIZE = 200
+DUE_SOON_DEFAULT_DAYS = 7
+MAX_DUE_WITHIN_DAYS = 365
+SCHEMA_VERSION = 1
+MAX_CACHED_PAGES = 256
+
+_schema_ready = set()
 
-DATABASE = 'data/kanban.db'
-MAX_COMPLETED_TASKS = 10
+# 设置后每个新连接都会把执行的 SQL 交给它（perf_gate.py 用来收集查询计划）
+sql_trace = None
 
-def get_db():
-    """获取数据库连接"""
-    if not os.path.exists(DATABASE):
-        init_db()
+def get_db(path=None):
+    """获取数据库连接（默认为当前请求所在看板的数据库）"""
+    if path is None:
+        path = current_board().path
+    # 每个进程对每个数据库执行一次建表/建索引，旧数据库也能补上新增的索引
+    if path not in _schema_ready:
+        init_db(path)
+        _schema_ready.add(path)
     # 添加 timeout=10 等待锁释放，check_same_thread=False 允许多线程访问
-    conn = sqlite3.connect(DATABASE, timeout=10, check_same_thread=False)
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    if sql_trace is not None:
+        conn.set_trace_callback(sql_trace)
     return conn
 
-def init_db():
+def migrate_due_dates(cursor):
+    """把历史的自由文本截止日期回填为 ISO 日期或 NULL"""
+    for table in ('tasks', 'archives'):
+        cursor.execute(f'SELECT id, due_date FROM {table} WHERE due_date IS NOT NULL')
+        for task_id, due_date in cursor.fetchall():
+            try:
+                normalized = normalize_due_date(due_date)
+            except ValueError:
+                print(f"[WARN] {table} {task_id}: 无法解析的截止日期 {due_date!r}，已清空")
+                normalized = None
+            if normalized != due_date:
+                cursor.execute(f'UPDATE {table} SET due_date = ? WHERE id = ?', (normalized, task_id))
+
+def init_db(path=DATABASE):
     """初始化数据库"""
-    os.makedirs('data', exist_ok=True)
-    conn = sqlite3.connect(DATABASE, timeout=10)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
     cursor = conn.cursor()
     
+    # 新建的数据库直接使用增量 vacuum；已有数据库用 maintenance.py --enable-incremental-vacuum 切换
+    cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS tasks (
             id TEXT PRIMARY KEY,
@@ -54,66 +96,158 @@ def init_db():
         )
     ''')
     
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)')
+    # (status, updated_at) 同时覆盖按状态计数和自动归档的按更新时间排序，取代单列的 status 索引
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status_updated ON tasks(status, updated_at)')
+    cursor.execute('DROP INDEX IF EXISTS idx_tasks_status')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at)')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_tasks_status_priority ON tasks(status, ({PRIORITY_RANK_SQL}), created_at)')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_tags ON tasks(tags)
+        WHERE tags IS NOT NULL AND tags != '[]'
+    ''')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_archives_month ON archives(archived_month)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_archives_archived_at ON archives(archived_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_archives_month_archived_at ON archives(archived_month, archived_at)')
+    
+    # 状态流转日志与流动指标汇总表
+    metrics.init_metrics_schema(cursor)
+    
+    # 按 PRAGMA user_version 执行一次性数据迁移
+    cursor.execute('PRAGMA user_version')
+    version = cursor.fetchone()[0]
+    if version < 1:
+        migrate_due_dates(cursor)
+    if version < SCHEMA_VERSION:
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    
+    # 未完成任务的截止日期部分索引，用于逾期/即将到期查询
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_due_open ON tasks(due_date)
+        WHERE due_date IS NOT NULL AND status != 'done'
+    ''')
     
     conn.commit()
     conn.close()
 
-def row_to_dict(row):
-    """将数据库行转换为字典"""
-    if row is None:
-        return None
-    result = dict(row)
-    # 解析 tags JSON
-    if result.get('tags'):
-        try:
-            result['tags'] = json.loads(result['tags'])
-        except:
-            result['tags'] = []
-    else:
-        result['tags'] = []
-    return result
-
 # Task operations
-def load_tasks():
-    """从数据库加载所有任务"""
-    conn = get_db()
+def query_tasks(conn):
+    """使用给定连接查询所有任务，返回 Task 列表"""
     cursor = conn.cursor()
     cursor.execute('SELECT * FROM tasks ORDER BY created_at DESC')
-    rows = cursor.fetchall()
-    conn.close()
-    return [row_to_dict(row) for row in rows]
+    return [Task.from_row(row) for row in cursor.fetchall()]
 
-def save_task(task):
-    """保存或更新任务"""
+def query_task_dicts(conn):
+    """查询所有任务并转换为 API 返回的字典（读缓存使用）"""
+    return [task.to_dict() for task in query_tasks(conn)]
+
+def load_due_tasks(start=None, end=None):
+    """查询截止日期在 [start, end] 内的未完成任务（日期为 ISO 字符串，None 表示不限）"""
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('''
-        INSERT OR REPLACE INTO tasks 
-        (id, title, description, status, priority, due_date, tags, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        task['id'],
-        task['title'],
-        task.get('description', ''),
-        task['status'],
-        task['priority'],
-        task.get('due_date', ''),
-        json.dumps(task.get('tags', [])),
-        task['created_at'],
-        task['updated_at']
-    ))
-    conn.commit()
+    cursor.execute(*due_tasks_sql(start, end))
+    rows = cursor.fetchall()
     conn.close()
+    return [Task.from_row(row) for row in rows]
 
-def delete_task_db(task_id):
-    """从数据库删除任务"""
-    conn = get_db()
+# 打开的看板，每个看板有自己的写线程和读缓存（写线程每次提交后让读缓存失效）
+board_registry = boards.BoardRegistry(get_db, query_task_dicts)
+
+# 默认看板常驻，不参与 LRU 淘汰
+default_board = board_registry.acquire(boards.DEFAULT_BOARD)
+
+def current_board():
+    """当前请求所在的看板，请求之外为默认看板"""
+    if has_request_context():
+        return g.get('board', default_board)
+    return default_board
+
+def run_write(fn, *args):
+    """把写操作交给当前看板的写线程，合并为批量事务提交"""
+    return current_board().writer.run(fn, *args)
+
+# 带指纹的静态资源（启动时计算哈希并预压缩）
+asset_manifest = assets.AssetManifest()
+
+# 渲染好的首页，按 (api_base, board_name, 资源版本) 缓存
+_page_cache = {}
+
+@app.template_global()
+def asset_url(filename):
+    """静态资源的指纹 URL，不在清单中的文件退回普通静态路径"""
+    return asset_manifest.url(filename) or url_for('static', filename=filename)
+
+# 以 _tx 结尾的函数在写线程的事务中执行，第一个参数为写连接，不自行提交
+def save_task_tx(conn, task):
+    """保存或更新任务（Task）"""
     cursor = conn.cursor()
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO tasks ({', '.join(TASK_COLUMNS)})
+        VALUES ({', '.join('?' * len(TASK_COLUMNS))})
+    ''', task.to_row())
+
+def create_task_tx(conn, task):
+    """新建任务并记录流转"""
+    # 毫秒时间戳作为 ID，同一毫秒内的并发创建顺延，避免覆盖已有任务
+    cursor = conn.cursor()
+    while cursor.execute('SELECT 1 FROM tasks WHERE id = ?', (task.id,)).fetchone():
+        task.id = str(int(task.id) + 1)
+    save_task_tx(conn, task)
+    metrics.record_transition(conn.cursor(), task.id, None, task.status.value, task.created_at)
+    return task
+
+def update_task_tx(conn, task_id, changes):
+    """
+    修改任务字段（changes 为已校验的 属性名 -> 值）
+    返回更新后的任务，任务不存在时返回 None
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    
+    task = Task.from_row(row)
+    for name, value in changes.items():
+        setattr(task, name, value)
+    task.updated_at = datetime.now().isoformat()
+    save_task_tx(conn, task)
+    return task
+
+def delete_task_tx(conn, task_id):
+    """删除任务并记录流转"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT status FROM tasks WHERE id = ?', (task_id,))
+    row = cursor.fetchone()
     cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
-    conn.commit()
-    conn.close()
+    if row:
+        metrics.record_transition(cursor, task_id, row[0], 'deleted')
+
+def update_status_tx(conn, task_id, status):
+    """
+    修改任务状态并记录流转，完成时触发自动归档
+    返回更新后的任务，任务不存在时返回 None
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    
+    task = Task.from_row(row)
+    old_status = task.status
+    task.status = status or old_status
+    task.updated_at = datetime.now().isoformat()
+    save_task_tx(conn, task)
+    metrics.record_transition(cursor, task_id, old_status, task.status, task.updated_at)
+    
+    # 触发自动归档
+    if task.status is Status.DONE:
+        auto_archive_tx(conn)
+    return task
+
+def delete_task_db(task_id):
+    """从数据库删除任务"""
+    run_write(delete_task_tx, task_id)
 
 # Archive operations
 def load_archive(month):
@@ -123,7 +257,7 @@ def load_archive(month):
     cursor.execute('SELECT * FROM archives WHERE archived_month = ? ORDER BY archived_at DESC', (month,))
     rows = cursor.fetchall()
     conn.close()
-    return [row_to_dict(row) for row in rows]
+    return [ArchivedTask.from_row(row) for row in rows]
 
 def load_all_archives():
     """加载所有归档任务"""
@@ -132,204 +266,241 @@ def load_all_archives():
     cursor.execute('SELECT * FROM archives ORDER BY archived_at DESC')
     rows = cursor.fetchall()
     conn.close()
-    return [row_to_dict(row) for row in rows]
+    return [ArchivedTask.from_row(row) for row in rows]
 
-def save_archive(task):
-    """保存归档任务"""
+def load_archive_page(month=None, limit=ARCHIVE_PAGE_SIZE, offset=0):
+    """分页加载归档任务（按归档时间倒序）"""
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('''
-        INSERT OR REPLACE INTO archives 
-        (id, title, description, status, priority, due_date, tags, 
-         created_at, updated_at, archived_at, archived_month)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        task['id'],
-        task['title'],
-        task.get('description', ''),
-        task['status'],
-        task['priority'],
-        task.get('due_date', ''),
-        json.dumps(task.get('tags', [])),
-        task['created_at'],
-        task['updated_at'],
-        task['archived_at'],
-        task['archived_month']
-    ))
-    conn.commit()
+    if month:
+        cursor.execute('''
+            SELECT * FROM archives WHERE archived_month = ?
+            ORDER BY archived_at DESC LIMIT ? OFFSET ?
+        ''', (month, limit, offset))
+    else:
+        cursor.execute('''
+            SELECT * FROM archives ORDER BY archived_at DESC LIMIT ? OFFSET ?
+        ''', (limit, offset))
+    rows = cursor.fetchall()
     conn.close()
+    return [ArchivedTask.from_row(row) for row in rows]
 
-def delete_archive(task_id):
-    """删除归档任务"""
+def load_archive_months():
+    """获取所有归档月份及数量"""
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('DELETE FROM archives WHERE id = ?', (task_id,))
-    conn.commit()
+    cursor.execute('''
+        SELECT archived_month, COUNT(*) FROM archives
+        GROUP BY archived_month ORDER BY archived_month DESC
+    ''')
+    rows = cursor.fetchall()
     conn.close()
+    return [{'month': row[0], 'count': row[1]} for row in rows]
 
-def auto_archive():
+def delete_archive_tx(conn, task_id):
+    """永久删除归档任务"""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM archives WHERE id = ?', (task_id,))
+    if cursor.rowcount:
+        metrics.record_transition(cursor, task_id, 'archived', 'deleted')
+
+def restore_task_tx(conn, task_id):
     """
-    自动归档最旧的任务
-    返回归档的任务ID列表
+    从归档恢复任务到主列表
+    返回恢复后的任务，归档不存在时返回 None
     """
-    conn = get_db()
     cursor = conn.cursor()
+    cursor.execute('SELECT * FROM archives WHERE id = ?', (task_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
     
-    # 获取已完成任务数量
-    cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = 'done'")
-    count = cursor.fetchone()[0]
-    
-    if count <= MAX_COMPLETED_TASKS:
-        conn.close()
-        return []
-    
-    # 获取需要归档的最旧任务
-    to_archive_count = count - MAX_COMPLETED_TASKS
-    cursor.execute('''
-        SELECT * FROM tasks 
-        WHERE status = 'done' 
-        ORDER BY updated_at ASC 
-        LIMIT ?
-    ''', (to_archive_count,))
-    
-    rows = cursor.fetchall()
-    archived_ids = []
-    
-    for row in rows:
-        task = row_to_dict(row)
-        # 添加归档信息
-        task['archived_at'] = datetime.now().isoformat()
-        task['archived_month'] = datetime.now().strftime('%Y-%m')
-        
-        # 保存到归档表
-        save_archive(task)
-        archived_ids.append(task['id'])
-        
-        # 从任务表删除
-        cursor.execute('DELETE FROM tasks WHERE id = ?', (task['id'],))
-    
-    conn.commit()
-    conn.close()
+    # 移除归档字段，重置状态
+    task = ArchivedTask.from_row(row).to_task()
+    task.status = Status.TODO
+    task.updated_at = datetime.now().isoformat()
     
-    return archived_ids
+    save_task_tx(conn, task)
+    cursor.execute('DELETE FROM archives WHERE id = ?', (task_id,))
+    metrics.record_transition(cursor, task_id, 'archived', task.status, task.updated_at)
+    return task
+
+def delete_archive(task_id):
+    """永久删除归档任务"""
+    run_write(delete_archive_tx, task_id)
 
-@app.route('/')
+@api.url_value_preprocessor
+def pull_board(endpoint, values):
+    """解析 /b/<board> 前缀并设置当前看板"""
+    name = values.pop('board', None) if values else None
+    if name is None:
+        g.board = default_board
+        g.api_base = ''
+        return
+    if not boards.board_exists(name):
+        abort(404)
+    g.board = board_registry.acquire(name)
+    g.board_acquired = True
+    g.api_base = f'/b/{name}'
+
+@app.teardown_request
+def release_board(exc):
+    if g.pop('board_acquired', False):
+        board_registry.release(g.board)
+
+@api.route('/')
 def index():
-    return render_template('index.html')
+    board = current_board()
+    board_name = None if board is default_board else board.name
+    if app.debug:
+        # 开发模式下修改静态文件后无需重启
+        asset_manifest.refresh()
+    
+    key = (g.api_base, board_name, asset_manifest.version)
+    body = _page_cache.get(key)
+    if body is None:
+        body = render_template('index.html', api_base=g.api_base, board_name=board_name).encode('utf-8')
+        if len(_page_cache) >= MAX_CACHED_PAGES:
+            _page_cache.clear()
+        _page_cache[key] = body
+    
+    # 页面本身每次协商（命中时返回 304），引用的资源为 immutable，不再发请求
+    response = Response(body, mimetype='text/html')
+    response.set_etag(hashlib.sha1(body).hexdigest())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
-@app.route('/api/tasks', methods=['GET'])
+@api.route('/api/tasks', methods=['GET'])
 def get_tasks():
-    tasks = load_tasks()
-    return jsonify(tasks)
+    # 直接返回缓存的序列化结果，看板未变化时不查询数据库
+    return Response(current_board().cache.get(), mimetype='application/json')
 
-@app.route('/api/tasks', methods=['POST'])
+@api.route('/api/tasks', methods=['POST'])
 def create_task():
     data = request.json
     
-    new_task = {
-        'id': str(int(datetime.now().timestamp() * 1000)),
-        'title': data.get('title', ''),
-        'description': data.get('description', ''),
-        'status': data.get('status', 'todo'),
-        'priority': data.get('priority', 'medium'),
-        'due_date': data.get('due_date', ''),
-        'tags': data.get('tags', []),
-        'created_at': datetime.now().isoformat(),
-        'updated_at': datetime.now().isoformat()
-    }
+    now = datetime.now()
+    try:
+        new_task = Task(
+            id=int(now.timestamp() * 1000),
+            title=data.get('title', ''),
+            description=data.get('description', ''),
+            status=data.get('status', 'todo'),
+            priority=data.get('priority', 'medium'),
+            due_date=data.get('due_date'),
+            tags=data.get('tags', []),
+            created_at=now.isoformat()
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    save_task(new_task)
-    return jsonify(new_task), 201
+    run_write(create_task_tx, new_task)
+    return jsonify(new_task.to_dict()), 201
+
+@api.route('/api/tasks/due', methods=['GET'])
+def get_due_tasks():
+    """获取今天起 within 天内到期的未完成任务（?within=7）"""
+    try:
+        within = int(request.args.get('within', DUE_SOON_DEFAULT_DAYS))
+    except ValueError:
+        return jsonify({'error': 'within must be an integer'}), 400
+    within = max(0, min(within, MAX_DUE_WITHIN_DAYS))
+    
+    today = datetime.now().date()
+    end = today + timedelta(days=within)
+    return jsonify([task.to_dict() for task in load_due_tasks(today.isoformat(), end.isoformat())])
 
-@app.route('/api/tasks/<task_id>', methods=['PUT'])
+@api.route('/api/tasks/overdue', methods=['GET'])
+def get_overdue_tasks():
+    """获取已逾期的未完成任务"""
+    yesterday = datetime.now().date() - timedelta(days=1)
+    return jsonify([task.to_dict() for task in load_due_tasks(end=yesterday.isoformat())])
+
+@api.route('/api/tasks/<task_id>', methods=['PUT'])
 def update_task(task_id):
     data = request.json
-    tasks = load_tasks()
-    
-    for task in tasks:
-        if task['id'] == task_id:
-            task['title'] = data.get('title', task['title'])
-            task['description'] = data.get('description', task['description'])
-            task['priority'] = data.get('priority', task['priority'])
-            task['due_date'] = data.get('due_date', task['due_date'])
-            task['tags'] = data.get('tags', task.get('tags', []))
-            task['updated_at'] = datetime.now().isoformat()
-            save_task(task)
-            return jsonify(task)
-    
-    return jsonify({'error': 'Task not found'}), 404
+    changes = {}
+    try:
+        if 'title' in data:
+            if not isinstance(data['title'], str) or not data['title'].strip():
+                raise ValueError('title is required')
+            changes['title'] = data['title']
+        if 'description' in data:
+            changes['description'] = parse_description(data['description'])
+        if 'priority' in data:
+            changes['priority'] = parse_priority(data['priority'])
+        if 'due_date' in data:
+            changes['due_date'] = normalize_due_date(data['due_date'])
+        if 'tags' in data:
+            changes['tags'] = parse_tags(data['tags'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # 按主键读取并修改，不再加载整个看板
+    task = run_write(update_task_tx, task_id, changes)
+    if task is None:
+        return jsonify({'error': 'Task not found'}), 404
+    return jsonify(task.to_dict())
 
-@app.route('/api/tasks/<task_id>', methods=['DELETE'])
+@api.route('/api/tasks/<task_id>', methods=['DELETE'])
 def delete_task(task_id):
     delete_task_db(task_id)
     return jsonify({'message': 'Task deleted'})
 
-@app.route('/api/tasks/<task_id>/status', methods=['PATCH'])
+@api.route('/api/tasks/<task_id>/status', methods=['PATCH'])
 def update_status(task_id):
     data = request.json
-    tasks = load_tasks()
-    
-    for task in tasks:
-        if task['id'] == task_id:
-            task['status'] = data.get('status', task['status'])
-            task['updated_at'] = datetime.now().isoformat()
-            save_task(task)
-            
-            # 触发自动归档
-            if task['status'] == 'done':
-                auto_archive()
-            
-            return jsonify(task)
-    
-    return jsonify({'error': 'Task not found'}), 404
+    status = data.get('status')
+    if status is not None:
+        try:
+            status = parse_status(status)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    # 读取、修改、记录流转和自动归档都在写线程的同一事务中完成
+    task = run_write(update_status_tx, task_id, status)
+    if task is None:
+        return jsonify({'error': 'Task not found'}), 404
+    return jsonify(task.to_dict())
 
 # Archive API endpoints
-@app.route('/api/archives', methods=['GET'])
+@api.route('/api/archives', methods=['GET'])
 def get_archives():
-    """获取所有归档任务或按月份筛选"""
+    """获取所有归档任务或按月份筛选，传入 limit/offset 时分页返回"""
     month = request.args.get('month')
-    if month:
+    if 'limit' in request.args or 'offset' in request.args:
+        try:
+            limit = int(request.args.get('limit', ARCHIVE_PAGE_SIZE))
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return jsonify({'error': 'limit and offset must be integers'}), 400
+        limit = max(1, min(limit, MAX_ARCHIVE_PAGE_SIZE))
+        archives = load_archive_page(month, limit, max(0, offset))
+    elif month:
         archives = load_archive(month)
     else:
         archives = load_all_archives()
-    return jsonify(archives)
+    return jsonify([archived.to_dict() for archived in archives])
+
+@api.route('/api/archives/months', methods=['GET'])
+def get_archive_months():
+    """获取归档月份列表及每月数量"""
+    return jsonify(load_archive_months())
 
-@app.route('/api/archives/<task_id>/restore', methods=['POST'])
+@api.route('/api/archives/<task_id>/restore', methods=['POST'])
 def restore_task(task_id):
     """从归档恢复任务到主列表"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # 查找归档任务
-    cursor.execute('SELECT * FROM archives WHERE id = ?', (task_id,))
-    row = cursor.fetchone()
-    
-    if not row:
-        conn.close()
+    task = run_write(restore_task_tx, task_id)
+    if task is None:
         return jsonify({'error': 'Archived task not found'}), 404
-    
-    task = row_to_dict(row)
-    
-    # 移除归档字段，重置状态
-    task['status'] = 'todo'
-    task['updated_at'] = datetime.now().isoformat()
-    
-    # 保存到任务表
-    save_task(task)
-    
-    # 从归档表删除
-    delete_archive(task_id)
-    
-    conn.close()
-    return jsonify(task)
+    return jsonify(task.to_dict())
 
-@app.route('/api/archives/<task_id>', methods=['DELETE'])
+@api.route('/api/archives/<task_id>', methods=['DELETE'])
 def delete_archived_task(task_id):
     """永久删除归档任务"""
     delete_archive(task_id)
     return jsonify({'message': 'Archived task deleted permanently'})
 
-@app.route('/api/stats')
+@api.route('/api/stats')
 def get_stats():
     conn = get_db()
     cursor = conn.cursor()
@@ -359,12 +530,13 @@ def get_stats():
         'archived': archived
     })
 
-@app.route('/api/tags', methods=['GET'])
+@api.route('/api/tags', methods=['GET'])
 def get_tags():
     """获取所有唯一标签"""
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('SELECT tags FROM tasks WHERE tags IS NOT NULL AND tags != "[]"')
+    # 条件与 idx_tasks_tags 一致，只读取部分索引；相同的标签组合只解析一次
+    cursor.execute("SELECT DISTINCT tags FROM tasks WHERE tags IS NOT NULL AND tags != '[]'")
     rows = cursor.fetchall()
     conn.close()
     
@@ -378,8 +550,125 @@ def get_tags():
     
     return jsonify(sorted(list(all_tags)))
 
+@api.route('/api/admin/writer', methods=['GET'])
+def admin_writer_stats():
+    """写线程的锁等待、排队等待和批大小直方图"""
+    return jsonify(current_board().writer.stats())
+
+@api.route('/api/admin/cache', methods=['GET'])
+def admin_cache_stats():
+    """看板读缓存命中率与重建耗时"""
+    return jsonify(current_board().cache.stats())
+
+# Metrics API endpoints
+@api.route('/api/metrics/flow', methods=['GET'])
+def get_flow_metrics():
+    """流动指标：累积流、吞吐量、周期时间百分位（?days=30）"""
+    try:
+        days = int(request.args.get('days', 30))
+    except ValueError:
+        return jsonify({'error': 'days must be an integer'}), 400
+    days = max(1, min(days, 366))
+    
+    conn = get_db()
+    result = metrics.flow_metrics(conn.cursor(), days)
+    conn.close()
+    return jsonify(result)
+
+# Backup & export API endpoints
+@api.route('/api/admin/backup', methods=['POST'])
+def admin_backup():
+    """在线备份数据库，返回备份耗时、速度和锁等待时间"""
+    try:
+        # 文件名带看板名，不同看板的备份互不覆盖
+        result = backup.backup_database(current_board().path, backup.default_backup_path(current_board().name))
+    except sqlite3.Error as e:
+        return jsonify({'error': f'Backup failed: {e}'}), 500
+    return jsonify(result)
+
+@api.route('/api/admin/maintenance', methods=['POST'])
+def admin_maintenance():
+    """执行数据库维护（清理过期归档、增量 vacuum、optimize）"""
+    data = request.get_json(silent=True) or {}
+    try:
+        retention_days = int(data.get('retention_days', maintenance.ARCHIVE_RETENTION_DAYS))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'retention_days must be an integer'}), 400
+    
+    try:
+        result = maintenance.run_maintenance(current_board().path, max(0, retention_days))
+    except sqlite3.Error as e:
+        return jsonify({'error': f'Maintenance failed: {e}'}), 500
+    return jsonify(result)
+
+@api.route('/api/export/<table>', methods=['GET'])
+def export_table(table):
+    """流式导出任务或归档（?format=ndjson|csv）"""
+    fmt = request.args.get('format', 'ndjson')
+    if table not in backup.EXPORT_TABLES:
+        return jsonify({'error': 'Unknown export table'}), 404
+    if fmt not in backup.EXPORT_FORMATS:
+        return jsonify({'error': 'Unsupported export format'}), 400
+
+    filename = f"{table}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    return Response(
+        backup.iter_export(table, fmt, current_board().path),
+        mimetype=backup.EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+# Static assets
+@app.route(assets.URL_PREFIX + '<path:filename>')
+def serve_asset(filename):
+    """返回带指纹的静态资源（按 Accept-Encoding 选择预压缩版本）"""
+    asset = asset_manifest.lookup(filename)
+    if asset is None:
+        abort(404)
+    encoding = assets.choose_encoding(asset, request.accept_encodings.quality)
+    response = Response(asset.bodies[encoding], mimetype=asset.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = assets.IMMUTABLE_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(f'{asset.etag}-{encoding}')
+    return response.make_conditional(request)
+
+@app.route('/api/admin/assets', methods=['GET'])
+def admin_assets():
+    """静态资源指纹与各编码的大小"""
+    return jsonify(asset_manifest.stats())
+
+# Board API endpoints
+@app.route('/api/boards', methods=['GET'])
+def get_boards():
+    """获取所有看板"""
+    return jsonify(boards.list_boards())
+
+@app.route('/api/boards', methods=['POST'])
+def create_board():
+    """新建看板（每个看板一个独立的数据库文件）"""
+    data = request.json or {}
+    name = data.get('name', '')
+    if not boards.is_valid_board_name(name):
+        return jsonify({'error': 'Invalid board name'}), 400
+    if boards.board_exists(name):
+        return jsonify({'error': 'Board already exists'}), 409
+    
+    init_db(boards.board_path(name))
+    return jsonify({'name': name, 'url': f'/b/{name}/'}), 201
+
+@app.route('/api/boards/summary', methods=['GET'])
+def get_boards_summary():
+    """并发统计所有看板的任务数量"""
+    summary = boards.summarize_boards()
+    summary['open_boards'] = board_registry.open_count()
+    return jsonify(summary)
+
+# 同一组接口同时挂在 / （默认看板）和 /b/<board> 下
+app.register_blueprint(api)
+app.register_blueprint(api, url_prefix='/b/<board>', name='board_api')
+
 if __name__ == '__main__':
     # 确保数据库已初始化
-    if not os.path.exists(DATABASE):
-        init_db()
+    init_db()
     app.run(host='0.0.0.0', port=5000, debug=True)
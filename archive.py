@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+任务归档
+已完成任务超过上限时，把最旧的完成任务移入 archives 表。
+看板（app.py）和同步脚本（openspec_sync.py）共用，不依赖 Flask。
+"""
+
+from datetime import datetime
+
+import metrics
+from models import Task, ArchivedTask, ARCHIVE_COLUMNS
+
+# 配置
+MAX_COMPLETED_TASKS = 10
+
+
+def save_archive_tx(conn, archived):
+    """保存归档任务（ArchivedTask）"""
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO archives ({', '.join(ARCHIVE_COLUMNS)})
+        VALUES ({', '.join('?' * len(ARCHIVE_COLUMNS))})
+    ''', archived.to_row())
+
+
+def auto_archive_tx(conn):
+    """
+    自动归档最旧的任务
+    返回归档的任务ID列表
+    """
+    cursor = conn.cursor()
+
+    # 获取已完成任务数量
+    cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = 'done'")
+    count = cursor.fetchone()[0]
+
+    if count <= MAX_COMPLETED_TASKS:
+        return []
+
+    # 获取需要归档的最旧任务
+    to_archive_count = count - MAX_COMPLETED_TASKS
+    cursor.execute('''
+        SELECT * FROM tasks
+        WHERE status = 'done'
+        ORDER BY updated_at ASC
+        LIMIT ?
+    ''', (to_archive_count,))
+
+    rows = cursor.fetchall()
+    archived_ids = []
+
+    for row in rows:
+        # 添加归档信息
+        now = datetime.now()
+        archived = ArchivedTask.from_task(Task.from_row(row), now.isoformat(), now.strftime('%Y-%m'))
+
+        # 保存到归档表
+        save_archive_tx(conn, archived)
+        archived_ids.append(archived.id)
+
+        # 从任务表删除
+        cursor.execute('DELETE FROM tasks WHERE id = ?', (archived.id,))
+        metrics.record_transition(cursor, archived.id, 'done', 'archived', archived.archived_at)
+
+    return archived_ids
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+静态资源指纹与预压缩（无需构建步骤）
+启动时读取 static/ 下的文件，按内容哈希生成带指纹的文件名（js/app.3f2a9c1b7d4e.js），
+并在内存中预先生成 gzip（以及安装了 brotli 时的 br）版本。
+带指纹的 URL 内容永不变化，可以使用一年的 immutable 缓存。
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+URL_PREFIX = '/assets/'
+HASH_LENGTH = 12
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# 只压缩文本类资源，且压缩后至少小 5% 才保留
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MIN_COMPRESSION_SAVING = 0.05
+
+
+class Asset:
+    __slots__ = ('name', 'fingerprinted', 'mimetype', 'etag', 'mtime_ns', 'bodies')
+
+    def __init__(self, name, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        root, ext = os.path.splitext(name)
+        self.name = name
+        self.fingerprinted = f'{root}.{digest}{ext}'
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.etag = digest
+        self.mtime_ns = os.stat(path).st_mtime_ns
+        self.bodies = {'identity': data}
+        if self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            self._add_variant('gzip', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                self._add_variant('br', brotli.compress(data, quality=11))
+
+    def _add_variant(self, encoding, body):
+        if len(body) <= len(self.bodies['identity']) * (1 - MIN_COMPRESSION_SAVING):
+            self.bodies[encoding] = body
+
+
+class AssetManifest:
+    def __init__(self, static_dir=STATIC_DIR, url_prefix=URL_PREFIX):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix
+        self.version = ''
+        self._assets = {}        # 原始文件名 -> Asset
+        self._by_url = {}        # 带指纹的文件名 -> Asset
+        self._lock = threading.Lock()
+        self.build()
+
+    def build(self):
+        """扫描静态目录，生成指纹和压缩版本"""
+        assets = {}
+        for root, _, files in os.walk(self.static_dir):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.static_dir).replace(os.sep, '/')
+                assets[name] = Asset(name, path)
+        with self._lock:
+            self._assets = assets
+            self._by_url = {asset.fingerprinted: asset for asset in assets.values()}
+            # 所有资源指纹的组合，用于让依赖资源 URL 的页面缓存失效
+            self.version = hashlib.sha256(
+                ''.join(sorted(asset.fingerprinted for asset in assets.values())).encode()
+            ).hexdigest()[:HASH_LENGTH]
+
+    def refresh(self):
+        """源文件有修改时重新生成（开发模式下使用），返回是否重建"""
+        for name, asset in list(self._assets.items()):
+            try:
+                changed = os.stat(os.path.join(self.static_dir, name)).st_mtime_ns != asset.mtime_ns
+            except OSError:
+                changed = True
+            if changed:
+                self.build()
+                return True
+        return False
+
+    def url(self, name):
+        """模板中使用的资源 URL；未知文件返回 None"""
+        asset = self._assets.get(name)
+        if asset is None:
+            return None
+        return self.url_prefix + asset.fingerprinted
+
+    def lookup(self, fingerprinted):
+        return self._by_url.get(fingerprinted)
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'brotli': brotli is not None,
+            'assets': {
+                name: {
+                    'url': self.url_prefix + asset.fingerprinted,
+                    'bytes': {encoding: len(body) for encoding, body in asset.bodies.items()},
+                }
+                for name, asset in self._assets.items()
+            },
+        }
+
+
+def choose_encoding(asset, accepted):
+    """
+    按客户端可接受的编码选择响应体
+    accepted: 返回编码质量值的函数（如 request.accept_encodings.quality）
+    """
+    for encoding in ('br', 'gzip'):
+        if encoding in asset.bodies and accepted(encoding) > 0:
+            return encoding
+    return 'identity'
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 """
 自动生成优化提示词 - 组合方案关键组件
+
+用法:
+    python3 auto-prompt.py <change-name>        # 生成提示词
+    python3 auto-prompt.py sync [--watch]       # 同步所有清单到看板（见 openspec_sync.py）
 """
 import sys
-import re
+
+import openspec_sync
 
 def generate_prompt(change_name):
     # 读取 tasks.md
@@ -15,18 +20,8 @@ def generate_prompt(change_name):
         print(f"Error: {tasks_file} not found")
         sys.exit(1)
     
-    # 解析任务列表
-    tasks = []
-    current_section = ""
-    for line in content.split('\n'):
-        if line.startswith('## '):
-            current_section = line[3:].strip()
-        elif line.strip().startswith('- [ ]'):
-            task_desc = line.strip()[6:].strip()
-            tasks.append({
-                'section': current_section,
-                'description': task_desc
-            })
+    # 解析任务列表（与看板同步共用解析器），只保留未完成的条目
+    tasks = [item for item in openspec_sync.parse_tasks(content) if not item['done']]
     
     task_count = len(tasks)
     
@@ -70,7 +65,10 @@ def generate_prompt(change_name):
 
 if __name__ == '__main__':
     if len(sys.argv) < 2:
-        print("Usage: python3 auto-prompt.py <change-name>")
+        print("Usage: python3 auto-prompt.py <change-name> | sync [--watch]")
         sys.exit(1)
     
+    if sys.argv[1] == 'sync':
+        sys.exit(openspec_sync.main(sys.argv[2:]))
+    
     print(generate_prompt(sys.argv[1]))
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库在线备份与导出
+使用 sqlite3 在线备份 API 按页分步复制，每步只短暂持有读锁；
+其他连接的提交会让分步复制从头开始，重启次数达到上限后改为一步复制整个数据库，
+保证繁忙的看板上备份也能完成，但这一步持续持有读锁，期间写入无法提交
+（返回的 writer_block 即写入方最长被阻塞的时间）；
+源数据库以只读方式打开，路径写错时报错而不是备份一个新建的空库；
+任务和归档可流式导出为 NDJSON / CSV
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+from models import TASK_COLUMNS, ARCHIVE_COLUMNS
+
+# 配置
+DATABASE = 'data/kanban.db'
+BACKUP_DIR = 'data/backup'
+BACKUP_PAGES_PER_STEP = 64   # 每步复制的页数，越小写入方等待越短
+BACKUP_STEP_PAUSE = 0.005    # 每步之间让出锁的时间（秒）
+BACKUP_BUSY_SLEEP = 0.05     # 源库被锁时重试前的等待时间（秒）
+BACKUP_MAX_RESTARTS = 3      # 分步复制被写入打断重启的次数上限，超过后一步复制完成
+EXPORT_BATCH_SIZE = 500      # 导出时每批读取的行数
+
+# sqlite3 的 backup_step 返回码
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+EXPORT_TABLES = {
+    'tasks': TASK_COLUMNS,
+    'archives': ARCHIVE_COLUMNS,
+}
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _connect_readonly(db_path):
+    """以只读方式打开已有的数据库，文件不存在时抛出 sqlite3.OperationalError"""
+    uri = 'file:' + urllib.request.pathname2url(os.path.abspath(db_path)) + '?mode=ro'
+    return sqlite3.connect(uri, uri=True, timeout=10)
+
+
+def default_backup_path(prefix='kanban'):
+    """
+    data/backup/<prefix>-<时间>.db，同一秒内重复时追加序号
+    以独占方式创建空文件占住文件名，并发的备份不会拿到同一个路径
+    """
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    base = os.path.join(BACKUP_DIR, f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    dest = base + '.db'
+    n = 1
+    while True:
+        try:
+            open(dest, 'x').close()
+            return dest
+        except FileExistsError:
+            dest = f'{base}-{n}.db'
+            n += 1
+
+
+def backup_database(db_path=DATABASE, dest=None, pages=BACKUP_PAGES_PER_STEP,
+                    max_restarts=BACKUP_MAX_RESTARTS):
+    """
+    在线备份数据库
+    每步只复制 pages 页，步与步之间释放读锁，让写入方可以提交；
+    被写入打断重启超过 max_restarts 次后，改为一步复制整个数据库（期间阻塞写入）
+    返回备份统计信息，writer_block 为单步持有读锁的最长时间
+    """
+    if dest is None:
+        dest = default_backup_path()
+    else:
+        os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+
+    # 先写临时文件，完成后再原子替换，避免留下半个备份；
+    # 临时文件名唯一，并发的备份不会删除彼此的临时文件
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(dest) + '.', suffix='.part',
+                                    dir=os.path.dirname(dest) or '.')
+    os.close(fd)
+
+    stats = {
+        'steps': 0,
+        'busy_steps': 0,
+        'restarts': 0,
+        'lock_wait': 0.0,
+        'writer_block': 0.0,
+        'page_count': 0,
+        'single_step': False,
+    }
+    state = {'last': None, 'remaining': None, 'prev_busy': False}
+
+    def progress(status, remaining, total):
+        now = time.perf_counter()
+        interval = now - state['last']
+        # 上一步被锁时，sqlite3 在回调之后还会睡眠一次
+        if state['prev_busy']:
+            interval = max(0.0, interval - BACKUP_BUSY_SLEEP)
+
+        stats['steps'] += 1
+        stats['page_count'] = total
+        busy = status in (SQLITE_BUSY, SQLITE_LOCKED)
+        if busy:
+            stats['busy_steps'] += 1
+            stats['lock_wait'] += interval + BACKUP_BUSY_SLEEP
+        else:
+            # 这一步持有源库的读锁（回滚日志模式下写入方无法提交）
+            stats['writer_block'] = max(stats['writer_block'], interval)
+            if state['remaining'] is not None and remaining > state['remaining']:
+                # 备份期间其他连接修改了源库，备份会从头开始
+                stats['restarts'] += 1
+                if stats['restarts'] > max_restarts and not stats['single_step']:
+                    raise _TooManyRestarts()
+        state['remaining'] = remaining
+        state['prev_busy'] = busy
+
+        if remaining > 0 and not busy:
+            time.sleep(BACKUP_STEP_PAUSE)
+        state['last'] = time.perf_counter()
+
+    try:
+        src = _connect_readonly(db_path)
+    except sqlite3.Error:
+        os.remove(tmp_path)
+        if os.path.exists(dest) and os.path.getsize(dest) == 0:
+            os.remove(dest)
+        raise
+    dst = sqlite3.connect(tmp_path)
+    started = time.perf_counter()
+    try:
+        state['last'] = started
+        try:
+            src.backup(dst, pages=pages, progress=progress, sleep=BACKUP_BUSY_SLEEP)
+        except _TooManyRestarts:
+            # 写入太频繁，分步复制追不上：一步复制完成（不会再被重启）
+            stats['single_step'] = True
+            state['remaining'] = None
+            state['prev_busy'] = False
+            state['last'] = time.perf_counter()
+            src.backup(dst, pages=-1, progress=progress, sleep=BACKUP_BUSY_SLEEP)
+        dst.close()
+        os.replace(tmp_path, dest)
+    except Exception:
+        dst.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        # 删除 default_backup_path 占位的空文件
+        if os.path.exists(dest) and os.path.getsize(dest) == 0:
+            os.remove(dest)
+        raise
+    finally:
+        src.close()
+    duration = time.perf_counter() - started
+
+    return {
+        'path': dest,
+        'size': os.path.getsize(dest),
+        'pages': stats['page_count'],
+        'steps': stats['steps'],
+        'busy_steps': stats['busy_steps'],
+        'restarts': stats['restarts'],
+        'single_step': stats['single_step'],
+        'duration': round(duration, 4),
+        'pages_per_sec': round(stats['page_count'] / duration, 1) if duration > 0 else None,
+        'lock_wait': round(stats['lock_wait'], 4),
+        'writer_block': round(stats['writer_block'], 4),
+    }
+
+
+def _format_row(columns, row, fmt):
+    """把一行数据格式化为 NDJSON 或 CSV 文本"""
+    if fmt == 'ndjson':
+        record = dict(zip(columns, row))
+        try:
+            record['tags'] = json.loads(record['tags']) if record['tags'] else []
+        except ValueError:
+            record['tags'] = []
+        return json.dumps(record, ensure_ascii=False) + '\n'
+
+    buf = io.StringIO()
+    csv.writer(buf).writerow(row)
+    return buf.getvalue()
+
+
+def iter_export(table, fmt='ndjson', db_path=DATABASE):
+    """
+    流式导出任务或归档
+    按 rowid 分批查询，每批查询结束即释放读锁，不会长时间阻塞写入
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"unknown table: {table}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown format: {fmt}")
+
+    columns = EXPORT_TABLES[table]
+    sql = (
+        f"SELECT rowid, {', '.join(columns)} FROM {table} "
+        "WHERE rowid > ? ORDER BY rowid LIMIT ?"
+    )
+
+    if fmt == 'csv':
+        buf = io.StringIO()
+        csv.writer(buf).writerow(columns)
+        yield buf.getvalue()
+
+    conn = _connect_readonly(db_path)
+    try:
+        last_rowid = 0
+        while True:
+            rows = conn.execute(sql, (last_rowid, EXPORT_BATCH_SIZE)).fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            yield ''.join(_format_row(columns, row[1:], fmt) for row in rows)
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='看板数据库备份与导出')
+    parser.add_argument('--db', default=DATABASE, help='数据库文件路径')
+    sub = parser.add_subparsers(dest='command')
+
+    snap = sub.add_parser('snapshot', help='在线备份数据库')
+    snap.add_argument('--dest', help='备份文件路径（默认 data/backup/kanban-<时间>.db）')
+    snap.add_argument('--pages', type=int, default=BACKUP_PAGES_PER_STEP, help='每步复制的页数')
+
+    exp = sub.add_parser('export', help='导出任务或归档')
+    exp.add_argument('table', choices=sorted(EXPORT_TABLES))
+    exp.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+    exp.add_argument('--output', help='输出文件（默认标准输出）')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'snapshot':
+        result = backup_database(args.db, args.dest, args.pages)
+        print(f"[DONE] 备份完成: {result['path']}")
+        print(f"  页数: {result['pages']}  步数: {result['steps']}  重新开始: {result['restarts']}")
+        print(f"  耗时: {result['duration']}s  速度: {result['pages_per_sec']} 页/秒")
+        print(f"  锁等待: {result['lock_wait']}s（{result['busy_steps']} 次）")
+        print(f"  写入阻塞: {result['writer_block']}s" + ("（一步复制）" if result['single_step'] else ''))
+        return 0
+
+    if args.command == 'export':
+        out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+        try:
+            for chunk in iter_export(args.table, args.format, args.db):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+        return 0
+
+    parser.print_help()
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
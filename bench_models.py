@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务模型内存基准
+生成一个合成看板，比较原来的 dict(row) + 解码 tags 列表
+与 models.Task.from_row 的每个任务内存占用
+
+用法: python3 bench_models.py [任务数，默认 100000]
+"""
+
+import json
+import random
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+from models import Task
+
+STATUSES = ('todo', 'in_progress', 'done')
+PRIORITIES = ('low', 'medium', 'high')
+TAG_POOL = ('工作', '重要', '待审核', 'bug', 'frontend', 'backend', 'openspec')
+
+
+def build_board(count):
+    """创建内存数据库并写入 count 个合成任务"""
+    rng = random.Random(42)
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''
+        CREATE TABLE tasks (
+            id TEXT PRIMARY KEY, title TEXT NOT NULL, description TEXT,
+            status TEXT NOT NULL, priority TEXT NOT NULL, due_date TEXT,
+            tags TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+        )
+    ''')
+    rows = []
+    for i in range(count):
+        tags = rng.sample(TAG_POOL, rng.randint(0, 3))
+        rows.append((
+            str(1700000000000 + i),
+            f'任务 {i}',
+            '描述' * rng.randint(0, 20),
+            rng.choice(STATUSES),
+            rng.choice(PRIORITIES),
+            f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}' if rng.random() < 0.5 else None,
+            json.dumps(tags),
+            '2026-01-01T09:00:00.000000',
+            '2026-01-02T09:00:00.000000',
+        ))
+    conn.executemany('INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    return conn
+
+
+def load_as_dicts(conn):
+    """原来的加载方式：sqlite3.Row -> dict，tags 解码为 list"""
+    conn.row_factory = sqlite3.Row
+    result = []
+    for row in conn.execute('SELECT * FROM tasks'):
+        task = dict(row)
+        task['tags'] = json.loads(task['tags']) if task['tags'] else []
+        result.append(task)
+    return result
+
+
+def load_as_models(conn):
+    conn.row_factory = None
+    return [Task.from_row(row) for row in conn.execute('SELECT * FROM tasks')]
+
+
+def measure(loader, conn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    tasks = loader(conn)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(tasks), current, elapsed
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 100000
+    conn = build_board(count)
+
+    print(f"合成看板: {count} 个任务")
+    results = {}
+    for name, loader in (('dict', load_as_dicts), ('Task', load_as_models)):
+        loaded, size, elapsed = measure(loader, conn)
+        results[name] = size
+        print(f"  {name:<5} 总内存 {size / 1024 / 1024:8.2f} MB  "
+              f"每个任务 {size / loaded:7.1f} 字节  加载耗时 {elapsed:.3f}s")
+    print(f"  Task 占用为 dict 的 {results['Task'] / results['dict']:.0%}")
+    conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
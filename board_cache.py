@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+看板读缓存
+缓存 GET /api/tasks 序列化后的响应体，只有在数据变化时才重新查询。
+数据是否变化由两部分判断：
+- PRAGMA data_version：其他连接（包括 cron 脚本等外部进程）提交后会变化
+- 写入版本号：本进程写路径调用 invalidate() 递增
+"""
+
+import itertools
+import json
+import threading
+import time
+
+
+class BoardCache:
+    def __init__(self, connect, loader):
+        """
+        connect: 返回数据库连接的函数，缓存持有该连接用于读取 data_version
+        loader: 接收连接并返回任务列表的函数
+        """
+        self._connect = connect
+        self._loader = loader
+        self._conn = None
+        self._lock = threading.Lock()     # 只保护重建，invalidate() 不获取
+        self._revisions = itertools.count(1)
+        self._revision = 0
+        self._built_revision = None
+        self._data_version = None
+        self._body = None
+        self._hits = 0
+        self._misses = 0
+        self._rebuild_time = 0.0
+        self._last_rebuild_time = 0.0
+
+    def invalidate(self):
+        """
+        写路径提交后调用，强制下次读取时重建
+        不加锁（next() 在 GIL 下是原子的），写线程不会被正在进行的重建阻塞
+        """
+        self._revision = next(self._revisions)
+
+    def _current_data_version(self):
+        # data_version 是按连接计数的，必须始终使用同一个连接读取
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def get(self):
+        """返回缓存的 JSON 响应体（bytes），必要时重建"""
+        with self._lock:
+            # 先记下版本号再查询：重建期间发生的提交会让下次读取再次重建
+            revision = self._revision
+            data_version = self._current_data_version()
+            if (self._body is not None
+                    and data_version == self._data_version
+                    and revision == self._built_revision):
+                self._hits += 1
+                return self._body
+
+            self._misses += 1
+            started = time.perf_counter()
+            tasks = self._loader(self._conn)
+            self._body = json.dumps(tasks, ensure_ascii=False).encode('utf-8')
+            self._last_rebuild_time = time.perf_counter() - started
+            self._rebuild_time += self._last_rebuild_time
+            self._data_version = data_version
+            self._built_revision = revision
+            return self._body
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._body = None
+
+    def stats(self):
+        """命中率与重建耗时统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else None,
+                'rebuild_time_ms': round(self._rebuild_time * 1000, 3),
+                'last_rebuild_ms': round(self._last_rebuild_time * 1000, 3),
+                'body_bytes': len(self._body) if self._body is not None else 0,
+            }
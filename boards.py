@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+多看板支持
+每个看板是一个独立的 SQLite 文件（默认看板仍为 data/kanban.db），
+各看板有自己的写线程和读缓存，不同看板的写入互不竞争。
+打开的看板由容量有限的 LRU 管理，淘汰时关闭其写线程和连接。
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from board_cache import BoardCache
+from writer import DbWriter
+
+DEFAULT_BOARD = 'default'
+DEFAULT_DATABASE = 'data/kanban.db'
+BOARDS_DIR = 'data/boards'
+MAX_OPEN_BOARDS = 32       # 同时保持打开的看板数
+SUMMARY_WORKERS = 8        # 跨看板汇总时的并发线程数
+
+BOARD_NAME_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+
+def is_valid_board_name(name):
+    return bool(BOARD_NAME_RE.match(name or ''))
+
+
+def board_path(name):
+    """看板名对应的数据库文件路径"""
+    if name == DEFAULT_BOARD:
+        return DEFAULT_DATABASE
+    return os.path.join(BOARDS_DIR, f'{name}.db')
+
+
+def board_exists(name):
+    return name == DEFAULT_BOARD or (is_valid_board_name(name) and os.path.exists(board_path(name)))
+
+
+def list_boards():
+    """列出所有看板名（默认看板在最前）"""
+    names = []
+    if os.path.isdir(BOARDS_DIR):
+        for filename in os.listdir(BOARDS_DIR):
+            name, ext = os.path.splitext(filename)
+            if ext == '.db' and is_valid_board_name(name) and name != DEFAULT_BOARD:
+                names.append(name)
+    return [DEFAULT_BOARD] + sorted(names)
+
+
+class Board:
+    def __init__(self, name, connect, loader):
+        """
+        connect: 接收数据库路径并返回连接的函数
+        loader: 接收连接并返回任务列表的函数（用于读缓存）
+        """
+        self.name = name
+        self.path = board_path(name)
+        self.refs = 0
+        self.cache = BoardCache(lambda: connect(self.path), loader)
+        self.writer = DbWriter(lambda: connect(self.path), on_commit=self.cache.invalidate)
+
+    def close(self):
+        self.writer.close()
+        self.cache.close()
+
+
+class BoardRegistry:
+    """按 LRU 管理打开的看板；正在被请求使用的看板不会被关闭"""
+
+    def __init__(self, connect, loader, max_open=MAX_OPEN_BOARDS):
+        self._connect = connect
+        self._loader = loader
+        self._max_open = max_open
+        self._boards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, name):
+        """获取看板并增加引用计数，使用完毕后需调用 release()"""
+        to_close = []
+        with self._lock:
+            board = self._boards.get(name)
+            if board is None:
+                board = Board(name, self._connect, self._loader)
+                self._boards[name] = board
+            self._boards.move_to_end(name)
+            board.refs += 1
+
+            # 从最久未使用的开始淘汰，跳过正在使用的看板
+            if len(self._boards) > self._max_open:
+                for old_name, old in list(self._boards.items()):
+                    if len(self._boards) <= self._max_open:
+                        break
+                    if old.refs == 0:
+                        del self._boards[old_name]
+                        to_close.append(old)
+        for old in to_close:
+            old.close()
+        return board
+
+    def release(self, board):
+        with self._lock:
+            board.refs -= 1
+
+    def open_count(self):
+        with self._lock:
+            return len(self._boards)
+
+    def close_all(self):
+        with self._lock:
+            boards = list(self._boards.values())
+            self._boards.clear()
+        for board in boards:
+            board.close()
+
+
+def _board_summary(name):
+    """统计单个看板的任务数量（只读短连接，不占用 LRU）"""
+    conn = sqlite3.connect(f'file:{board_path(name)}?mode=ro', uri=True, timeout=10)
+    try:
+        counts = dict(conn.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall())
+        archived = conn.execute('SELECT COUNT(*) FROM archives').fetchone()[0]
+    finally:
+        conn.close()
+    return {
+        'board': name,
+        'total': sum(counts.values()),
+        'todo': counts.get('todo', 0),
+        'in_progress': counts.get('in_progress', 0),
+        'done': counts.get('done', 0),
+        'archived': archived,
+    }
+
+
+def summarize_boards(names=None):
+    """并发统计所有看板，返回每个看板的统计和总计"""
+    names = names or [name for name in list_boards() if os.path.exists(board_path(name))]
+    with ThreadPoolExecutor(max_workers=SUMMARY_WORKERS) as pool:
+        futures = [(name, pool.submit(_board_summary, name)) for name in names]
+
+    boards = []
+    totals = {'total': 0, 'todo': 0, 'in_progress': 0, 'done': 0, 'archived': 0}
+    for name, future in futures:
+        try:
+            summary = future.result()
+        except sqlite3.Error as e:
+            boards.append({'board': name, 'error': str(e)})
+            continue
+        boards.append(summary)
+        for key in totals:
+            totals[key] += summary[key]
+    return {'boards': boards, 'totals': totals}
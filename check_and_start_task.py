@@ -12,45 +12,52 @@ import os
 import requests
 from datetime import datetime
 
+import metrics
+from models import Task, Status, PRIORITY_LABELS, PRIORITY_RANK_SQL
+
 # 配置
 DATABASE = '/home/pi/.openclaw/workspace/aimier-kanban/data/kanban.db'
 DINGTALK_WEBHOOK = None  # 如果需要钉钉通知，可以配置webhook
 
+# 按优先级、创建时间排序，走 idx_tasks_status_priority 索引（perf_gate.py 会检查查询计划）
+TASKS_BY_STATUS_SQL = f'''
+    SELECT * FROM tasks 
+    WHERE status = ? 
+    ORDER BY {PRIORITY_RANK_SQL}, created_at ASC
+'''
+
 def get_db():
     """获取数据库连接"""
     # 添加 timeout=10 等待锁释放，避免数据库锁定错误
     conn = sqlite3.connect(DATABASE, timeout=10)
-    conn.row_factory = sqlite3.Row
     return conn
 
 def get_tasks_by_status(status):
-    """获取指定状态的任务"""
+    """获取指定状态的任务，返回 Task 列表"""
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('''
-        SELECT * FROM tasks 
-        WHERE status = ? 
-        ORDER BY 
-            CASE priority 
-                WHEN 'high' THEN 1 
-                WHEN 'medium' THEN 2 
-                WHEN 'low' THEN 3 
-            END,
-            created_at ASC
-    ''', (status,))
+    cursor.execute(TASKS_BY_STATUS_SQL, (status.value,))
     rows = cursor.fetchall()
     conn.close()
-    return [dict(row) for row in rows]
+    return [Task.from_row(row) for row in rows]
 
 def update_task_status(task_id, new_status):
-    """更新任务状态"""
+    """更新任务状态，并记录状态流转"""
     conn = get_db()
     cursor = conn.cursor()
+    metrics.init_metrics_schema(cursor)
+    cursor.execute('SELECT status FROM tasks WHERE id = ?', (task_id,))
+    row = cursor.fetchone()
+    if row is None:
+        conn.close()
+        return
+    now = datetime.now().isoformat()
     cursor.execute('''
         UPDATE tasks 
         SET status = ?, updated_at = ? 
         WHERE id = ?
-    ''', (new_status, datetime.now().isoformat(), task_id))
+    ''', (new_status.value, now, task_id))
+    metrics.record_transition(cursor, task_id, row[0], new_status.value, now, 'check_and_start_task')
     conn.commit()
     conn.close()
 
@@ -81,17 +88,17 @@ def check_and_start_task():
     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 开始检查看板任务...")
     
     # 1. 检查是否有进行中的任务
-    in_progress_tasks = get_tasks_by_status('in_progress')
+    in_progress_tasks = get_tasks_by_status(Status.IN_PROGRESS)
     
     if in_progress_tasks:
         print(f"  ✓ 已有 {len(in_progress_tasks)} 个进行中的任务")
         for task in in_progress_tasks:
-            print(f"    - [{task['priority']}] {task['title']}")
+            print(f"    - [{task.priority.value}] {task.title}")
         print("  → 无需启动新任务")
         return False
     
     # 2. 没有进行中的任务，获取待办任务
-    todo_tasks = get_tasks_by_status('todo')
+    todo_tasks = get_tasks_by_status(Status.TODO)
     
     if not todo_tasks:
         print("  ✗ 没有待办任务")
@@ -115,10 +122,10 @@ def check_and_start_task():
     # 3. 获取第一个待办任务（按优先级和创建时间排序）
     first_task = todo_tasks[0]
     
-    print(f"  → 找到待办任务: [{first_task['priority']}] {first_task['title']}")
+    print(f"  → 找到待办任务: [{first_task.priority.value}] {first_task.title}")
     
     # 4. 更新任务状态为进行中
-    update_task_status(first_task['id'], 'in_progress')
+    update_task_status(first_task.id, Status.IN_PROGRESS)
     print(f"  ✓ 任务已移至进行中列表")
     
     # 5. 构建任务详情
@@ -127,15 +134,15 @@ def check_and_start_task():
 ⏰ 启动时间：{datetime.now().strftime('%Y-%m-%d %H:%M')}
 
 🎯 **任务信息：**
-• 标题：{first_task['title']}
-• 优先级：{'🔴 高' if first_task['priority'] == 'high' else '🟡 中' if first_task['priority'] == 'medium' else '🟢 低'}
+• 标题：{first_task.title}
+• 优先级：{PRIORITY_LABELS.get(first_task.priority, '🟢 低')}
 • 状态：🔄 进行中"""
     
-    if first_task.get('description'):
-        task_info += f"\n• 描述：{first_task['description'][:100]}{'...' if len(first_task['description']) > 100 else ''}"
+    if first_task.description:
+        task_info += f"\n• 描述：{first_task.description[:100]}{'...' if len(first_task.description) > 100 else ''}"
     
-    if first_task.get('due_date'):
-        task_info += f"\n• 截止日期：{first_task['due_date']}"
+    if first_task.due_date:
+        task_info += f"\n• 截止日期：{first_task.due_date}"
     
     task_info += f"""
 
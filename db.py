@@ -3,6 +3,8 @@ import json
 import os
 from datetime import datetime
 
+from models import normalize_due_date
+
 DATABASE = 'data/kanban.db'
 
 def get_db_connection():
@@ -49,13 +51,24 @@ def init_db():
     ''')
     
     # 创建索引
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status_updated ON tasks(status, updated_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_archives_month ON archives(archived_month)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_archives_archived_at ON archives(archived_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_archives_month_archived_at ON archives(archived_month, archived_at)')
     
     conn.commit()
     conn.close()
     print("[DONE] 任务1.1-1.4: 数据库初始化完成")
 
+def _migrated_due_date(task):
+    """JSON 中的自由文本截止日期规范化为 ISO 日期，无法解析时清空"""
+    try:
+        return normalize_due_date(task.get('due_date'))
+    except ValueError:
+        print(f"[WARN] {task.get('id')}: 无法解析的截止日期 {task.get('due_date')!r}，已清空")
+        return None
+
 def migrate_json_to_sqlite():
     """将 JSON 数据迁移到 SQLite"""
     conn = get_db_connection()
@@ -78,7 +91,7 @@ def migrate_json_to_sqlite():
                 task.get('description', ''),
                 task.get('status', 'todo'),
                 task.get('priority', 'medium'),
-                task.get('due_date', ''),
+                _migrated_due_date(task),
                 json.dumps(task.get('tags', [])) if task.get('tags') else '[]',
                 task.get('created_at', datetime.now().isoformat()),
                 task.get('updated_at', datetime.now().isoformat())
@@ -108,7 +121,7 @@ def migrate_json_to_sqlite():
                         task.get('description', ''),
                         task.get('status', 'done'),
                         task.get('priority', 'medium'),
-                        task.get('due_date', ''),
+                        _migrated_due_date(task),
                         json.dumps(task.get('tags', [])) if task.get('tags') else '[]',
                         task.get('created_at', datetime.now().isoformat()),
                         task.get('updated_at', datetime.now().isoformat()),
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库定期维护脚本（建议由 cron 每天执行一次）
+1. 按保留期限分批清理过期归档，每批单独提交，避免长时间持有写锁
+2. 用 incremental_vacuum 分步归还空闲页（已有数据库切换为 auto_vacuum=INCREMENTAL 需要
+   一次完整 VACUUM，会长时间持有排他锁，只在命令行显式传入 --enable-incremental-vacuum 时执行）
+3. 执行 PRAGMA optimize（首次没有统计信息时执行 ANALYZE）
+每次运行报告释放的页数和持有写锁的总时间
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import metrics
+
+# 配置
+DATABASE = 'data/kanban.db'
+ARCHIVE_RETENTION_DAYS = 0     # 归档保留天数，0 表示永久保留
+PURGE_CHUNK_SIZE = 200         # 每批删除的归档数
+PURGE_CHUNK_PAUSE = 0.01       # 批与批之间让出写锁的时间（秒）
+VACUUM_CHUNK_PAGES = 256       # 每步 incremental_vacuum 归还的页数
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def connect(db_path=DATABASE):
+    """获取维护用连接（手动控制事务，便于统计持锁时间）"""
+    return sqlite3.connect(db_path, timeout=10, isolation_level=None)
+
+
+def _write_tx(conn, stats, fn, *args):
+    """在 BEGIN IMMEDIATE 事务中执行 fn，并累计持有写锁的时间"""
+    conn.execute('BEGIN IMMEDIATE')
+    started = time.perf_counter()
+    try:
+        result = fn(*args)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        stats['lock_held'] += time.perf_counter() - started
+    return result
+
+
+def enable_incremental_vacuum(conn, stats):
+    """
+    切换为 auto_vacuum=INCREMENTAL
+    已有数据的库需要执行一次 VACUUM 才能生效，只在第一次切换时发生
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        return False
+    started = time.perf_counter()
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+    stats['lock_held'] += time.perf_counter() - started
+    return True
+
+
+def purge_archives(conn, stats, retention_days=ARCHIVE_RETENTION_DAYS, chunk_size=PURGE_CHUNK_SIZE):
+    """分批删除超过保留期限的归档，返回删除数量"""
+    if not retention_days:
+        return 0
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+    cursor = conn.cursor()
+
+    def delete_chunk():
+        # archived_at 有索引，每批只读取 chunk_size 行
+        cursor.execute('''
+            SELECT id FROM archives WHERE archived_at < ?
+            ORDER BY archived_at LIMIT ?
+        ''', (cutoff, chunk_size))
+        ids = [row[0] for row in cursor.fetchall()]
+        for task_id in ids:
+            cursor.execute('DELETE FROM archives WHERE id = ?', (task_id,))
+            metrics.record_transition(cursor, task_id, 'archived', 'deleted', source='retention')
+        return len(ids)
+
+    purged = 0
+    while True:
+        deleted = _write_tx(conn, stats, delete_chunk)
+        if not deleted:
+            break
+        purged += deleted
+        stats['purge_chunks'] += 1
+        if deleted < chunk_size:
+            break
+        time.sleep(PURGE_CHUNK_PAUSE)
+    return purged
+
+
+def incremental_vacuum(conn, stats, pages=VACUUM_CHUNK_PAGES):
+    """分步归还空闲页，返回归还的页数"""
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        return 0
+    before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    remaining = before
+    while remaining > 0:
+        started = time.perf_counter()
+        # execute() 只单步执行一次（每步只归还一页），executescript 会执行到完成
+        conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+        stats['lock_held'] += time.perf_counter() - started
+        now_remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if now_remaining >= remaining:
+            break
+        remaining = now_remaining
+        time.sleep(PURGE_CHUNK_PAUSE)
+    return before - remaining
+
+
+def optimize(conn, stats):
+    """更新查询规划器统计信息，返回是否执行了完整 ANALYZE"""
+    started = time.perf_counter()
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    ).fetchone() is not None
+    if not has_stats:
+        conn.execute('ANALYZE')
+    conn.execute('PRAGMA optimize')
+    stats['lock_held'] += time.perf_counter() - started
+    return not has_stats
+
+
+def run_maintenance(db_path=DATABASE, retention_days=ARCHIVE_RETENTION_DAYS, convert=False):
+    """
+    执行一次完整维护，返回统计信息
+    convert=True 时把尚未启用增量 vacuum 的数据库切换过来（完整 VACUUM）
+    """
+    stats = {'lock_held': 0.0, 'purge_chunks': 0}
+    started = time.perf_counter()
+    conn = connect(db_path)
+    try:
+        _write_tx(conn, stats, metrics.init_metrics_schema, conn.cursor())
+        converted = enable_incremental_vacuum(conn, stats) if convert else False
+        conversion_pending = conn.execute('PRAGMA auto_vacuum').fetchone()[0] != AUTO_VACUUM_INCREMENTAL
+        purged = purge_archives(conn, stats, retention_days)
+        freed_pages = incremental_vacuum(conn, stats)
+        analyzed = optimize(conn, stats)
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    finally:
+        conn.close()
+
+    return {
+        'converted_to_incremental': converted,
+        'incremental_vacuum_pending': conversion_pending,
+        'purged_archives': purged,
+        'purge_chunks': stats['purge_chunks'],
+        'freed_pages': freed_pages,
+        'freed_bytes': freed_pages * page_size,
+        'page_count': page_count,
+        'analyzed': analyzed,
+        'lock_held': round(stats['lock_held'], 4),
+        'duration': round(time.perf_counter() - started, 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='看板数据库维护')
+    parser.add_argument('--db', default=DATABASE, help='数据库文件路径')
+    parser.add_argument('--retention-days', type=int, default=ARCHIVE_RETENTION_DAYS,
+                        help='归档保留天数，0 表示永久保留')
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help='切换为 auto_vacuum=INCREMENTAL（执行一次完整 VACUUM，期间阻塞写入）')
+    args = parser.parse_args(argv)
+
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 开始数据库维护...")
+    result = run_maintenance(args.db, args.retention_days, args.enable_incremental_vacuum)
+    if result['converted_to_incremental']:
+        print("  ✓ 已切换为 auto_vacuum=INCREMENTAL")
+    elif result['incremental_vacuum_pending']:
+        print("  ! 尚未启用增量 vacuum，空闲页不会归还；请在空闲时段执行一次 --enable-incremental-vacuum")
+    print(f"  ✓ 清理过期归档 {result['purged_archives']} 个（{result['purge_chunks']} 批）")
+    print(f"  ✓ 归还空闲页 {result['freed_pages']} 页（{result['freed_bytes']} 字节）")
+    print(f"  ✓ 统计信息已更新{'（完整 ANALYZE）' if result['analyzed'] else ''}")
+    print(f"  ✓ 持有写锁 {result['lock_held']}s，总耗时 {result['duration']}s")
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"❌ 执行出错: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+任务流转记录与流动指标
+task_transitions 是只追加的状态流转日志；每次写入时同步更新按天汇总的表，
+/api/metrics/flow 只读取汇总表，不扫描原始流转记录：
+- flow_daily: 每天各状态的净变化量（累计求和即为累积流图）
+- throughput_daily: 每天完成的任务数
+- flow_time_daily: 每天完成的周期时间 / 前置时间 / 进行中停留时间的分桶直方图
+"""
+
+from datetime import datetime, timedelta
+
+# 累积流图统计的状态（deleted 只记录日志，不计入累积流）
+FLOW_STATUSES = ('todo', 'in_progress', 'done', 'archived')
+
+# 时长直方图的分桶上界（秒），最后一个桶没有上界
+TIME_BUCKETS = (
+    15 * 60, 3600, 2 * 3600, 4 * 3600, 8 * 3600,
+    86400, 2 * 86400, 3 * 86400, 7 * 86400, 14 * 86400, 30 * 86400, 90 * 86400,
+)
+TIME_KINDS = ('cycle', 'lead', 'in_progress')
+PERCENTILES = (50, 85, 95)
+
+
+def init_metrics_schema(cursor):
+    """创建流转日志与汇总表；首次创建时根据现有任务回填"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS task_transitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id TEXT NOT NULL,
+            from_status TEXT,
+            to_status TEXT NOT NULL,
+            at TEXT NOT NULL,
+            source TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transitions_task ON task_transitions(task_id, id)')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS flow_daily (
+            day TEXT NOT NULL,
+            status TEXT NOT NULL,
+            delta INTEGER NOT NULL,
+            PRIMARY KEY (day, status)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS throughput_daily (
+            day TEXT PRIMARY KEY,
+            completed INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS flow_time_daily (
+            day TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            total_seconds REAL NOT NULL,
+            PRIMARY KEY (day, kind, bucket)
+        )
+    ''')
+
+    cursor.execute('SELECT 1 FROM task_transitions LIMIT 1')
+    if cursor.fetchone() is None:
+        backfill_transitions(cursor)
+
+
+def backfill_transitions(cursor):
+    """
+    为没有流转记录的历史任务生成近似记录：
+    created_at 进入待办，updated_at 进入当前状态，归档任务再记一次 archived_at 归档
+    """
+    cursor.execute('SELECT id, status, created_at, updated_at FROM tasks')
+    for task_id, status, created_at, updated_at in cursor.fetchall():
+        record_transition(cursor, task_id, None, 'todo', created_at, 'backfill')
+        record_transition(cursor, task_id, 'todo', status, updated_at, 'backfill')
+
+    cursor.execute('SELECT id, created_at, updated_at, archived_at FROM archives')
+    for task_id, created_at, updated_at, archived_at in cursor.fetchall():
+        record_transition(cursor, task_id, None, 'todo', created_at, 'backfill')
+        record_transition(cursor, task_id, 'todo', 'done', updated_at, 'backfill')
+        record_transition(cursor, task_id, 'done', 'archived', archived_at, 'backfill')
+
+
+def _parse(ts):
+    try:
+        return datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bucket_for(seconds):
+    for i, upper in enumerate(TIME_BUCKETS):
+        if seconds <= upper:
+            return i
+    return len(TIME_BUCKETS)
+
+
+def _add_flow_time(cursor, day, kind, start, end):
+    start_dt, end_dt = _parse(start), _parse(end)
+    if start_dt is None or end_dt is None:
+        return
+    seconds = max(0.0, (end_dt - start_dt).total_seconds())
+    cursor.execute('''
+        INSERT INTO flow_time_daily (day, kind, bucket, count, total_seconds)
+        VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT(day, kind, bucket) DO UPDATE SET
+            count = count + 1,
+            total_seconds = total_seconds + excluded.total_seconds
+    ''', (day, kind, _bucket_for(seconds), seconds))
+
+
+def _add_flow_delta(cursor, day, status, delta):
+    if status not in FLOW_STATUSES:
+        return
+    cursor.execute('''
+        INSERT INTO flow_daily (day, status, delta) VALUES (?, ?, ?)
+        ON CONFLICT(day, status) DO UPDATE SET delta = delta + excluded.delta
+    ''', (day, status, delta))
+
+
+def record_transition(cursor, task_id, from_status, to_status, at=None, source='app'):
+    """
+    记录一次状态流转并增量更新汇总表
+    需要与状态修改在同一个事务中调用，由调用方负责提交
+    """
+    if from_status == to_status:
+        return
+    at = at or datetime.now().isoformat()
+    day = at[:10]
+
+    if from_status == 'in_progress' or to_status == 'done':
+        # 只读取该任务自己的流转记录（按 task_id 索引），不扫描全表
+        cursor.execute('''
+            SELECT to_status, at FROM task_transitions
+            WHERE task_id = ? ORDER BY id DESC
+        ''', (task_id,))
+        history = cursor.fetchall()
+
+        if from_status == 'in_progress':
+            for status, ts in history:
+                if status == 'in_progress':
+                    _add_flow_time(cursor, day, 'in_progress', ts, at)
+                    break
+
+        if to_status == 'done':
+            # 本轮开始时间：最近一次进入待办；周期开始：之后第一次进入进行中
+            started = None
+            queued = None
+            for status, ts in history:
+                if status == 'in_progress':
+                    started = ts
+                elif status == 'todo':
+                    queued = ts
+                    break
+            if started:
+                _add_flow_time(cursor, day, 'cycle', started, at)
+            if queued:
+                _add_flow_time(cursor, day, 'lead', queued, at)
+            cursor.execute('''
+                INSERT INTO throughput_daily (day, completed) VALUES (?, 1)
+                ON CONFLICT(day) DO UPDATE SET completed = completed + 1
+            ''', (day,))
+
+    cursor.execute('''
+        INSERT INTO task_transitions (task_id, from_status, to_status, at, source)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (task_id, from_status, to_status, at, source))
+
+    if from_status:
+        _add_flow_delta(cursor, day, from_status, -1)
+    _add_flow_delta(cursor, day, to_status, 1)
+
+
+def last_entered(cursor, task_id, status):
+    """任务最近一次进入某状态的时间"""
+    cursor.execute('''
+        SELECT at FROM task_transitions
+        WHERE task_id = ? AND to_status = ? ORDER BY id DESC LIMIT 1
+    ''', (task_id, status))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _summarize_times(rows):
+    """
+    根据分桶直方图估算百分位数：在目标所在的桶内按上下界线性插值
+    （假设桶内均匀分布）；最后一个桶没有上界，取该桶的平均时长
+    """
+    counts = [0] * (len(TIME_BUCKETS) + 1)
+    bucket_seconds = [0.0] * (len(TIME_BUCKETS) + 1)
+    for bucket, count, seconds in rows:
+        counts[bucket] += count
+        bucket_seconds[bucket] += seconds
+    total = sum(counts)
+    summary = {
+        'count': total,
+        'avg_seconds': round(sum(bucket_seconds) / total, 1) if total else None,
+    }
+    for p in PERCENTILES:
+        value = None
+        if total:
+            target = total * p / 100
+            seen = 0
+            for i, count in enumerate(counts):
+                if count and seen + count >= target:
+                    if i < len(TIME_BUCKETS):
+                        lower = TIME_BUCKETS[i - 1] if i else 0
+                        value = lower + (TIME_BUCKETS[i] - lower) * (target - seen) / count
+                    else:
+                        value = bucket_seconds[i] / count
+                    value = round(value, 1)
+                    break
+                seen += count
+        summary[f'p{p}_seconds'] = value
+    return summary
+
+
+def flow_metrics(cursor, days=30):
+    """从汇总表读取最近 days 天的流动指标"""
+    today = datetime.now().date()
+    start = today - timedelta(days=days - 1)
+    start_day = start.isoformat()
+    day_list = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+
+    # 累积流：起始日之前的净变化作为基线，再逐日累加
+    totals = dict.fromkeys(FLOW_STATUSES, 0)
+    cursor.execute('''
+        SELECT status, SUM(delta) FROM flow_daily WHERE day < ? GROUP BY status
+    ''', (start_day,))
+    for status, delta in cursor.fetchall():
+        totals[status] = delta
+
+    daily = {}
+    cursor.execute('SELECT day, status, delta FROM flow_daily WHERE day >= ?', (start_day,))
+    for day, status, delta in cursor.fetchall():
+        daily.setdefault(day, {})[status] = delta
+
+    cumulative_flow = []
+    for day in day_list:
+        for status, delta in daily.get(day, {}).items():
+            totals[status] += delta
+        cumulative_flow.append(dict(totals, day=day))
+
+    cursor.execute('SELECT day, completed FROM throughput_daily WHERE day >= ?', (start_day,))
+    completed = dict(cursor.fetchall())
+    throughput = [{'day': day, 'completed': completed.get(day, 0)} for day in day_list]
+
+    times = {}
+    for kind in TIME_KINDS:
+        cursor.execute('''
+            SELECT bucket, SUM(count), SUM(total_seconds) FROM flow_time_daily
+            WHERE kind = ? AND day >= ? GROUP BY bucket
+        ''', (kind, start_day))
+        times[kind] = _summarize_times(cursor.fetchall())
+
+    return {
+        'days': days,
+        'cumulative_flow': cumulative_flow,
+        'throughput': throughput,
+        'cycle_time': times['cycle'],
+        'lead_time': times['lead'],
+        'in_progress_time': times['in_progress'],
+    }
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+任务模型
+app.py 和各脚本共用的紧凑任务对象：
+- Task / ArchivedTask 使用 __slots__，没有每个实例的 __dict__
+- 状态和优先级是枚举单例，标签为驻留字符串组成的 tuple
+- from_row 直接从 SELECT * 的行元组构造（数据库中的数据可信，不再校验）；
+  其他构造方式会校验字段
+"""
+
+import json
+import sys
+from datetime import datetime
+from enum import Enum
+
+
+class Status(str, Enum):
+    TODO = 'todo'
+    IN_PROGRESS = 'in_progress'
+    DONE = 'done'
+
+
+class Priority(str, Enum):
+    LOW = 'low'
+    MEDIUM = 'medium'
+    HIGH = 'high'
+
+
+PRIORITY_LABELS = {
+    Priority.HIGH: '🔴 高',
+    Priority.MEDIUM: '🟡 中',
+    Priority.LOW: '🟢 低',
+}
+
+TASK_COLUMNS = (
+    'id', 'title', 'description', 'status', 'priority', 'due_date', 'tags',
+    'created_at', 'updated_at'
+)
+ARCHIVE_COLUMNS = TASK_COLUMNS + ('archived_at', 'archived_month')
+
+# 按优先级排序的 SQL 表达式；idx_tasks_status_priority 索引的也是这个表达式，
+# 查询中必须原样使用才能走索引
+PRIORITY_RANK_SQL = "CASE priority WHEN 'high' THEN 1 WHEN 'medium' THEN 2 WHEN 'low' THEN 3 END"
+
+# 截止日期可接受的输入格式，统一存储为 ISO 日期（YYYY-MM-DD）或 NULL
+DUE_DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d', '%Y%m%d', '%Y年%m月%d日')
+
+# 从数据库字符串到枚举单例的快速查找（比 Status(value) 快）
+_STATUS_BY_VALUE = {s.value: s for s in Status}
+_PRIORITY_BY_VALUE = {p.value: p for p in Priority}
+
+# 相同的 tags JSON 共享同一个 tuple，看板上标签组合通常很少
+_TAGS_CACHE = {}
+_TAGS_CACHE_SIZE = 4096
+
+
+def parse_status(value):
+    """校验并返回 Status，非法值抛出 ValueError"""
+    try:
+        return _STATUS_BY_VALUE[value]
+    except (KeyError, TypeError):
+        raise ValueError(f'Invalid status: {value!r}') from None
+
+
+def parse_priority(value):
+    """校验并返回 Priority，非法值抛出 ValueError"""
+    try:
+        return _PRIORITY_BY_VALUE[value]
+    except (KeyError, TypeError):
+        raise ValueError(f'Invalid priority: {value!r}') from None
+
+
+def parse_tags(value):
+    """把标签列表规范化为去空白、驻留后的 tuple"""
+    if value is None:
+        return ()
+    if not isinstance(value, (list, tuple)) or not all(isinstance(tag, str) for tag in value):
+        raise ValueError('tags must be a list of strings')
+    return tuple(sys.intern(tag.strip()) for tag in value if tag.strip())
+
+
+def normalize_due_date(value):
+    """
+    将截止日期规范化为 ISO 日期字符串，空值返回 None
+    无法解析时抛出 ValueError
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    # 带时间的 ISO 字符串只保留日期部分
+    if 'T' in value:
+        value = value.split('T', 1)[0]
+    for fmt in DUE_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f'Invalid due_date: {value}')
+
+
+def due_tasks_sql(start=None, end=None):
+    """
+    截止日期在 [start, end] 内的未完成任务（日期为 ISO 字符串，None 表示不限），返回 (sql, params)
+    条件与 idx_tasks_due_open 的 WHERE 一致，确保走部分索引（perf_gate.py 会检查查询计划）
+    """
+    sql = "SELECT * FROM tasks WHERE due_date IS NOT NULL AND status != 'done'"
+    params = []
+    if start is not None:
+        sql += ' AND due_date >= ?'
+        params.append(start)
+    if end is not None:
+        sql += ' AND due_date <= ?'
+        params.append(end)
+    return sql + ' ORDER BY due_date ASC', params
+
+
+def parse_description(value):
+    """描述必须是字符串，None 视为空"""
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ValueError('description must be a string')
+    return value
+
+
+def _value(member):
+    # from_row 遇到未知的旧数据时保留原始字符串
+    return getattr(member, 'value', member)
+
+
+def _decode_tags(raw):
+    """解码数据库中的 tags JSON，结果按原始字符串缓存"""
+    if not raw:
+        return ()
+    tags = _TAGS_CACHE.get(raw)
+    if tags is None:
+        try:
+            decoded = json.loads(raw)
+            tags = tuple(sys.intern(tag) for tag in decoded if isinstance(tag, str))
+        except ValueError:
+            tags = ()
+        if len(_TAGS_CACHE) < _TAGS_CACHE_SIZE:
+            _TAGS_CACHE[raw] = tags
+    return tags
+
+
+class Task:
+    __slots__ = TASK_COLUMNS
+
+    def __init__(self, id, title, description='', status=Status.TODO,
+                 priority=Priority.MEDIUM, due_date=None, tags=(),
+                 created_at=None, updated_at=None):
+        if not isinstance(title, str) or not title.strip():
+            raise ValueError('title is required')
+        self.id = str(id)
+        self.title = title
+        self.description = parse_description(description)
+        self.status = parse_status(status)
+        self.priority = parse_priority(priority)
+        self.due_date = normalize_due_date(due_date)
+        self.tags = parse_tags(tags)
+        self.created_at = created_at
+        self.updated_at = updated_at or created_at
+
+    @classmethod
+    def from_row(cls, row):
+        """从 SELECT * 的行（元组或 sqlite3.Row）构造，不做校验"""
+        task = cls.__new__(cls)
+        (task.id, task.title, task.description, status, priority,
+         task.due_date, tags, task.created_at, task.updated_at) = row[:9]
+        task.status = _STATUS_BY_VALUE.get(status, status)
+        task.priority = _PRIORITY_BY_VALUE.get(priority, priority)
+        task.tags = _decode_tags(tags)
+        return task
+
+    def to_dict(self):
+        """转换为 API 返回的字典"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'status': _value(self.status),
+            'priority': _value(self.priority),
+            'due_date': self.due_date,
+            'tags': list(self.tags),
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+    def to_row(self):
+        """转换为按 TASK_COLUMNS 排列的参数元组，用于写入数据库"""
+        return (
+            self.id, self.title, self.description, _value(self.status),
+            _value(self.priority), self.due_date, json.dumps(list(self.tags)),
+            self.created_at, self.updated_at,
+        )
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in TASK_COLUMNS)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.id} {_value(self.status)} {self.title!r}>'
+
+
+class ArchivedTask(Task):
+    __slots__ = ('archived_at', 'archived_month')
+
+    def __init__(self, id, title, *args, archived_at=None, archived_month=None, **kwargs):
+        """参数同 Task，另需归档时间；archived_month 默认取 archived_at 的年月"""
+        super().__init__(id, title, *args, **kwargs)
+        if not archived_at:
+            raise ValueError('archived_at is required')
+        self.archived_at = archived_at
+        self.archived_month = archived_month or archived_at[:7]
+
+    @classmethod
+    def from_task(cls, task, archived_at, archived_month):
+        """由任务生成归档记录"""
+        archived = cls.__new__(cls)
+        for name in TASK_COLUMNS:
+            setattr(archived, name, getattr(task, name))
+        archived.archived_at = archived_at
+        archived.archived_month = archived_month
+        return archived
+
+    @classmethod
+    def from_row(cls, row):
+        archived = super().from_row(row)
+        archived.archived_at, archived.archived_month = row[9:11]
+        return archived
+
+    def to_task(self):
+        """恢复为普通任务（去掉归档字段）"""
+        task = Task.__new__(Task)
+        for name in TASK_COLUMNS:
+            setattr(task, name, getattr(self, name))
+        return task
+
+    def to_dict(self):
+        result = super().to_dict()
+        result['archived_at'] = self.archived_at
+        result['archived_month'] = self.archived_month
+        return result
+
+    def to_row(self):
+        return super().to_row() + (self.archived_at, self.archived_month)
+
+    def __eq__(self, other):
+        result = super().__eq__(other)
+        if result is not True:
+            return result
+        return (self.archived_at, self.archived_month) == (other.archived_at, other.archived_month)
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OpenSpec 清单同步到看板
+扫描 openspec/changes/*/tasks.md，把其中的 `- [ ]` / `- [x]` 条目同步为看板任务：
+- 解析结果按文件 mtime/大小/内容哈希缓存在 data/openspec_cache.json，只重新解析变化的文件
+- 每个条目对应一个 ID 固定的任务（spec-<change>-<编号>），标签为 ['openspec', <change>]
+- [x] 对应已完成；[ ] 对应待办（看板上已进行中的任务保持不变）
+- 所有新增、修改、删除在一个事务中提交，并记录状态流转；已完成任务超过上限时
+  在同一事务中按看板规则自动归档
+- 在看板上删除的任务不会被重新创建，直到清单中对应条目本身发生变化
+- --watch 轮询目录，持续应用变化
+
+用法:
+    python3 openspec_sync.py            # 同步一次
+    python3 openspec_sync.py --watch    # 持续监视
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import metrics
+from archive import auto_archive_tx
+from models import Task, Status, TASK_COLUMNS
+
+# 配置
+DATABASE = 'data/kanban.db'
+CHANGES_DIR = 'openspec/changes'
+CACHE_FILE = 'data/openspec_cache.json'
+WATCH_INTERVAL = 2.0           # 监视模式的轮询间隔（秒）
+TASK_ID_PREFIX = 'spec-'
+SYNC_TAG = 'openspec'
+SYNC_SOURCE = 'openspec_sync'  # 流转记录中的来源
+
+ITEM_RE = re.compile(r'^\s*[-*]\s+\[([ xX])\]\s+(.*\S)\s*$')
+NUMBER_RE = re.compile(r'^(\d+(?:\.\d+)*)\.?\s')
+# 条目 key：编号或 10 位文本哈希，都不含 '-'，因此能从任务 ID 中无歧义地分出变更名
+KEY_RE = re.compile(r'^(?:\d+(?:\.\d+)*|[0-9a-f]{10})$')
+
+
+def parse_tasks(content):
+    """
+    解析 tasks.md，返回条目列表
+    每个条目: {'key', 'section', 'text', 'done'}；key 优先使用条目编号（如 1.2），
+    没有编号时使用文本哈希，保证条目顺序变化时 ID 不变
+    """
+    items = []
+    seen = set()
+    section = ''
+    for line in content.split('\n'):
+        if line.startswith('## '):
+            section = line[3:].strip()
+            continue
+        match = ITEM_RE.match(line)
+        if not match:
+            continue
+        text = match.group(2)
+        number = NUMBER_RE.match(text)
+        key = number.group(1) if number else hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]
+        if key in seen:
+            # 重复编号时退回文本哈希
+            key = hashlib.sha1(f'{section}\n{text}'.encode('utf-8')).hexdigest()[:10]
+        seen.add(key)
+        items.append({
+            'key': key,
+            'section': section,
+            'text': text,
+            'done': match.group(1) != ' ',
+        })
+    return items
+
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache, path=CACHE_FILE):
+    """先写临时文件再替换，避免中断时留下半个缓存文件"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def scan_changes(cache, changes_dir=CHANGES_DIR):
+    """
+    扫描所有 tasks.md，返回 (各变更的条目, 内容变化的变更 -> 变化的条目 key 集合, 缓存是否更新)
+    mtime 和大小都未变时直接使用缓存；否则读取并比较内容哈希，哈希不同才重新解析
+    与上次解析结果相比新增或修改的条目记入 key 集合（没有上次结果时为空）
+    """
+    changes = {}
+    changed = {}
+    dirty = False
+    seen_paths = set()
+
+    for path in sorted(glob.glob(os.path.join(changes_dir, '*', 'tasks.md'))):
+        change = os.path.basename(os.path.dirname(path))
+        seen_paths.add(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+
+        entry = cache.get(path)
+        if entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+            changes[change] = entry['items']
+            continue
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        if entry and entry['sha1'] == digest:
+            # 只是 touch 过，内容未变
+            items = entry['items']
+        else:
+            items = parse_tasks(data.decode('utf-8'))
+            previous = {item['key']: item for item in entry['items']} if entry else {}
+            changed[change] = {item['key'] for item in items
+                               if previous and previous.get(item['key']) != item}
+        cache[path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha1': digest, 'items': items}
+        changes[change] = items
+        dirty = True
+
+    # 已删除的文件从缓存中移除（对应的任务保留在看板上）
+    for path in list(cache):
+        if path not in seen_paths:
+            del cache[path]
+            dirty = True
+    return changes, changed, dirty
+
+
+def task_id(change, key):
+    return f'{TASK_ID_PREFIX}{change}-{key}'
+
+
+def change_of(tid, changes):
+    """由任务 ID 判断属于 changes 中的哪个变更（不依赖可在界面上修改的标签）"""
+    for change in changes:
+        prefix = task_id(change, '')
+        if tid.startswith(prefix) and KEY_RE.match(tid[len(prefix):]):
+            return change
+    return None
+
+
+def _existing_tasks(cursor):
+    """读取看板上由同步生成的任务（按主键前缀范围查询）"""
+    cursor.execute(
+        'SELECT * FROM tasks WHERE id >= ? AND id < ?',
+        (TASK_ID_PREFIX, TASK_ID_PREFIX[:-1] + chr(ord(TASK_ID_PREFIX[-1]) + 1))
+    )
+    return {row[0]: Task.from_row(row) for row in cursor.fetchall()}
+
+
+def _archived_ids(cursor):
+    cursor.execute(
+        'SELECT id FROM archives WHERE id >= ? AND id < ?',
+        (TASK_ID_PREFIX, TASK_ID_PREFIX[:-1] + chr(ord(TASK_ID_PREFIX[-1]) + 1))
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _deleted_ids(cursor):
+    """
+    最近一次流转为删除的同步任务，返回 任务 ID -> 删除来源
+    按 idx_transitions_task 取每个任务的最后一条流转记录
+    """
+    cursor.execute('''
+        SELECT task_id, source FROM task_transitions AS t
+        WHERE task_id >= ? AND task_id < ? AND to_status = 'deleted'
+          AND id = (SELECT MAX(id) FROM task_transitions WHERE task_id = t.task_id)
+    ''', (TASK_ID_PREFIX, TASK_ID_PREFIX[:-1] + chr(ord(TASK_ID_PREFIX[-1]) + 1)))
+    return dict(cursor.fetchall())
+
+
+def _save(cursor, task):
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO tasks ({', '.join(TASK_COLUMNS)})
+        VALUES ({', '.join('?' * len(TASK_COLUMNS))})
+    ''', task.to_row())
+
+
+def apply_changes(conn, changes, changed_items=None):
+    """
+    在一个事务中把 changes（变更名 -> 条目列表）同步到看板
+    只处理 changes 中出现的变更；changed_items（变更名 -> 条目 key 集合）为清单中
+    有变化的条目，只有这些条目会重新创建在看板上被删除的任务
+    返回新增、更新、删除、归档的数量
+    """
+    changed_items = changed_items or {}
+    result = {'created': 0, 'updated': 0, 'deleted': 0, 'archived': 0}
+    if not changes:
+        return result
+    now = datetime.now().isoformat()
+    cursor = conn.cursor()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        metrics.init_metrics_schema(cursor)
+        existing = _existing_tasks(cursor)
+        archived = _archived_ids(cursor)
+        deleted = _deleted_ids(cursor)
+        wanted = set()
+
+        for change, items in changes.items():
+            for item in items:
+                tid = task_id(change, item['key'])
+                wanted.add(tid)
+                if tid in archived:
+                    # 已被看板自动归档，不再重新创建
+                    continue
+                if (deleted.get(tid, SYNC_SOURCE) != SYNC_SOURCE
+                        and item['key'] not in changed_items.get(change, ())):
+                    # 在看板上被删除，清单条目未变化时不再重新创建
+                    continue
+                status = Status.DONE if item['done'] else Status.TODO
+                task = existing.get(tid)
+
+                if task is None:
+                    task = Task(tid, item['text'], description=f"{change} / {item['section']}",
+                                status=status, tags=[SYNC_TAG, change], created_at=now)
+                    _save(cursor, task)
+                    metrics.record_transition(cursor, tid, None, task.status.value, now, SYNC_SOURCE)
+                    result['created'] += 1
+                    continue
+
+                old_status = task.status
+                if item['done']:
+                    task.status = Status.DONE
+                elif old_status == Status.DONE:
+                    task.status = Status.TODO
+                # 未勾选的条目在看板上已进行中时保持进行中
+
+                description = f"{change} / {item['section']}"
+                if (task.title, task.description, task.status) == (item['text'], description, old_status):
+                    continue
+                task.title = item['text']
+                task.description = description
+                task.updated_at = now
+                _save(cursor, task)
+                metrics.record_transition(cursor, tid, old_status, task.status, now, SYNC_SOURCE)
+                result['updated'] += 1
+
+        # 清单中已删除的条目：删除对应任务
+        for tid, task in existing.items():
+            if tid in wanted or change_of(tid, changes) is None:
+                continue
+            cursor.execute('DELETE FROM tasks WHERE id = ?', (tid,))
+            metrics.record_transition(cursor, tid, task.status, 'deleted', now, SYNC_SOURCE)
+            result['deleted'] += 1
+
+        # 勾选的条目可能让已完成任务超过上限，与看板上完成任务时一样自动归档
+        result['archived'] = len(auto_archive_tx(conn))
+
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return result
+
+
+def sync_once(conn, cache, full=True):
+    """
+    扫描并同步一次
+    full=True 时同步所有变更（首次运行），否则只同步内容变化的变更
+    """
+    changes, changed, dirty = scan_changes(cache)
+    if not full:
+        changes = {name: items for name, items in changes.items() if name in changed}
+    result = apply_changes(conn, changes, changed)
+    if dirty:
+        save_cache(cache)
+    result['files'] = len(changes) if full else len(changed)
+    return result
+
+
+def connect(db_path=DATABASE):
+    """同步用连接（手动控制事务，整次同步一个事务）"""
+    conn = sqlite3.connect(db_path, timeout=10, isolation_level=None)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks'").fetchone() is None:
+        conn.close()
+        raise RuntimeError(f'{db_path} 中没有 tasks 表，请先启动 app.py 初始化数据库')
+    return conn
+
+
+def _report(result):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 同步 {result['files']} 个清单："
+          f"新增 {result['created']}，更新 {result['updated']}，删除 {result['deleted']}，"
+          f"归档 {result['archived']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='同步 OpenSpec 任务清单到看板')
+    parser.add_argument('--db', default=DATABASE, help='看板数据库文件路径')
+    parser.add_argument('--watch', action='store_true', help='持续监视清单变化')
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL, help='监视轮询间隔（秒）')
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    cache = load_cache()
+    try:
+        _report(sync_once(conn, cache))
+        while args.watch:
+            time.sleep(args.interval)
+            result = sync_once(conn, cache, full=False)
+            if result['files']:
+                _report(result)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能回归检查（查询计划 + 接口耗时）
+1. 在临时目录生成合成看板（默认 20000 个任务、50000 条归档）
+2. 用 Flask 测试客户端依次请求登记的接口，记录每个接口实际执行的 SQL，
+   再加上 cron 脚本的热点查询，逐条执行 EXPLAIN QUERY PLAN：
+   大表（tasks / archives / task_transitions）出现全表 SCAN 或临时排序 B-tree 即判定失败
+3. 每个接口取多次请求的中位耗时，与 perf_baseline.json 比较，超过阈值视为回归
+
+用法:
+    python3 perf_gate.py                      # 检查，失败时退出码为 1
+    python3 perf_gate.py --update-baseline    # 重新记录基准（耗时与查询计划）
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+BASELINE_FILE = os.path.join(ROOT, 'perf_baseline.json')
+DEFAULT_TASKS = 20000
+DEFAULT_ARCHIVES = 50000
+DEFAULT_REPEAT = 15
+DEFAULT_THRESHOLD = 1.0        # 比基准慢一倍以上视为回归（共享机器上耗时抖动较大）
+MIN_REGRESSION_MS = 2.0        # 绝对差值小于该值时忽略（避免几毫秒以内的抖动）
+
+# 行数随看板增长的表：这些表上的查询必须走索引
+LARGE_TABLES = ('tasks', 'archives', 'task_transitions')
+FULL_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)$')    # 旧版 SQLite 输出 SCAN TABLE x
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+STATUSES = ('todo', 'in_progress')
+PRIORITIES = ('low', 'medium', 'high')
+TAG_POOL = ('工作', '重要', '待审核', 'bug', 'frontend', 'backend', 'openspec')
+
+
+def seed(conn, task_count, archive_count, rng):
+    """写入合成任务、归档和流转记录（已完成任务保持在自动归档上限以内）"""
+    import archive
+    now = datetime.now()
+    tasks = []
+    transitions = []
+    for i in range(task_count):
+        created = now - timedelta(minutes=i * 7)
+        status = 'done' if i < archive.MAX_COMPLETED_TASKS else rng.choice(STATUSES)
+        due = (now.date() + timedelta(days=rng.randint(-30, 60))).isoformat() if rng.random() < 0.4 else None
+        tasks.append((
+            str(1700000000000 + i), f'任务 {i}', '描述' * rng.randint(0, 20), status,
+            rng.choice(PRIORITIES), due, json.dumps(rng.sample(TAG_POOL, rng.randint(0, 3))),
+            created.isoformat(), (created + timedelta(hours=1)).isoformat(),
+        ))
+        transitions.append((str(1700000000000 + i), None, status, created.isoformat(), 'seed'))
+
+    archives = []
+    for i in range(archive_count):
+        archived = now - timedelta(hours=i)
+        archives.append((
+            str(1600000000000 + i), f'归档 {i}', '', 'done', rng.choice(PRIORITIES), None,
+            json.dumps(rng.sample(TAG_POOL, rng.randint(0, 2))),
+            archived.isoformat(), archived.isoformat(), archived.isoformat(), archived.strftime('%Y-%m'),
+        ))
+
+    conn.executemany('INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', tasks)
+    conn.executemany('INSERT INTO archives VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', archives)
+    conn.executemany('''
+        INSERT INTO task_transitions (task_id, from_status, to_status, at, source)
+        VALUES (?, ?, ?, ?, ?)
+    ''', transitions)
+    conn.commit()
+    return [row[0] for row in tasks if row[3] == 'todo']
+
+
+def explain(conn, sql):
+    """返回查询计划（每个节点一行）"""
+    return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+
+
+def check_plan(plan):
+    """返回查询计划中的问题列表"""
+    problems = []
+    touches_large = any(f' {table}' in line for line in plan for table in LARGE_TABLES)
+    for line in plan:
+        match = FULL_SCAN_RE.match(line)
+        if match and match.group(1) in LARGE_TABLES:
+            problems.append(f'全表扫描 {match.group(1)}')
+        if 'USE TEMP B-TREE' in line and touches_large:
+            problems.append(line)
+    return problems
+
+
+def _shape(sql):
+    """去掉字面量后的 SQL，相同形状的查询只检查一次，也便于与基准比较"""
+    return LITERAL_RE.sub('?', ' '.join(sql.split()))
+
+
+def script_queries(conn):
+    """cron 脚本与同步脚本中的热点查询（不经过接口，单独登记）"""
+    import check_and_start_task
+    import metrics
+    import openspec_sync
+    import remind_task_completion
+
+    queries = {}
+    for status in ('todo', 'in_progress'):
+        sql = check_and_start_task.TASKS_BY_STATUS_SQL.replace('?', f"'{status}'")
+        queries[f'check_and_start_task.get_tasks_by_status({status})'] = [sql]
+    queries['remind_task_completion.get_in_progress_tasks'] = [remind_task_completion.IN_PROGRESS_SQL]
+
+    # 提醒脚本的到期查询（与 remind_task_completion.main 的参数一致）
+    today = datetime.now().date()
+    due_soon = (today.isoformat(), (today + timedelta(days=remind_task_completion.DUE_SOON_DAYS)).isoformat())
+    overdue = (None, (today - timedelta(days=1)).isoformat())
+
+    # 直接接收游标的函数用带跟踪的连接调用，记录实际执行的 SQL
+    for name, fn in (
+        ('metrics.last_entered', lambda cursor: metrics.last_entered(cursor, '1700000000000', 'in_progress')),
+        ('openspec_sync.existing_tasks', openspec_sync._existing_tasks),
+        ('openspec_sync.deleted_ids', openspec_sync._deleted_ids),
+        ('remind_task_completion.get_due_tasks(due_soon)',
+         lambda cursor: cursor.execute(*remind_task_completion.due_tasks_sql(*due_soon))),
+        ('remind_task_completion.get_due_tasks(overdue)',
+         lambda cursor: cursor.execute(*remind_task_completion.due_tasks_sql(*overdue))),
+    ):
+        captured = []
+        conn.set_trace_callback(captured.append)
+        fn(conn.cursor())
+        conn.set_trace_callback(None)
+        queries[name] = captured
+    return queries
+
+
+def run_gate(task_count, archive_count, repeat):
+    """在临时目录中生成看板、请求接口并收集查询计划，返回 (计划, 耗时)；结束后恢复工作目录并删除临时目录"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='kanban-perf-') as workdir:
+        os.chdir(workdir)
+        try:
+            return _collect(task_count, archive_count, repeat)
+        finally:
+            os.chdir(cwd)
+
+
+def _collect(task_count, archive_count, repeat):
+    import app
+    app.init_db()
+    conn = sqlite3.connect(app.DATABASE)
+    try:
+        return _measure(app, conn, task_count, archive_count, repeat)
+    finally:
+        # 先关闭所有连接，再删除临时目录
+        conn.close()
+        app.board_registry.close_all()
+
+
+def _measure(app, conn, task_count, archive_count, repeat):
+    rng = random.Random(42)
+    todo_ids = seed(conn, task_count, archive_count, rng)
+    month = datetime.now().strftime('%Y-%m')
+    client = app.app.test_client()
+
+    def toggle_status(i):
+        return ('PATCH', f'/api/tasks/{todo_ids[-1]}/status',
+                {'status': 'in_progress' if i % 2 == 0 else 'todo'})
+
+    def complete_task(i):
+        # 每次完成一个待办任务，触发一次自动归档
+        return ('PATCH', f'/api/tasks/{todo_ids[i]}/status', {'status': 'done'})
+
+    def edit_task(i):
+        return ('PUT', f'/api/tasks/{todo_ids[-2]}', {'title': f'修改 {i}', 'tags': ['工作']})
+
+    def create_task(i):
+        return ('POST', '/api/tasks', {'title': f'新任务 {i}', 'priority': 'high', 'tags': ['bug']})
+
+    def cold_tasks(i):
+        app.default_board.cache.invalidate()
+        return ('GET', '/api/tasks', None)
+
+    endpoints = [
+        ('GET /', ('GET', '/', None)),
+        ('GET /api/tasks', ('GET', '/api/tasks', None)),
+        ('GET /api/tasks (cold)', cold_tasks),
+        ('GET /api/tasks/due', ('GET', '/api/tasks/due?within=7', None)),
+        ('GET /api/tasks/overdue', ('GET', '/api/tasks/overdue', None)),
+        ('GET /api/stats', ('GET', '/api/stats', None)),
+        ('GET /api/tags', ('GET', '/api/tags', None)),
+        ('GET /api/archives (page)', ('GET', '/api/archives?limit=50&offset=1000', None)),
+        ('GET /api/archives (month page)', ('GET', f'/api/archives?month={month}&limit=50', None)),
+        ('GET /api/archives/months', ('GET', '/api/archives/months', None)),
+        ('GET /api/metrics/flow', ('GET', '/api/metrics/flow?days=30', None)),
+        ('POST /api/tasks', create_task),
+        ('PUT /api/tasks/<id>', edit_task),
+        ('PATCH /api/tasks/<id>/status', toggle_status),
+        ('PATCH /api/tasks/<id>/status (auto-archive)', complete_task),
+    ]
+
+    captured = []
+    app.sql_trace = captured.append
+    queries = {}
+    timings = {}
+    gc.disable()    # 避免垃圾回收落在个别请求上造成抖动
+    try:
+        for name, spec in endpoints:
+            samples = []
+            captured.clear()
+            for i in range(repeat + 1):
+                method, path, body = spec(i) if callable(spec) else spec
+                started = time.perf_counter()
+                response = client.open(path, method=method, json=body)
+                elapsed = (time.perf_counter() - started) * 1000
+                if response.status_code >= 400:
+                    raise RuntimeError(f'{name}: HTTP {response.status_code}')
+                if i:
+                    samples.append(elapsed)    # 第一次请求作为预热
+            timings[name] = round(statistics.median(samples), 3)
+            queries[name] = list(captured)
+            gc.collect()
+    finally:
+        gc.enable()
+        app.sql_trace = None
+
+    queries.update(script_queries(conn))
+
+    plans = {}
+    for name, statements in queries.items():
+        seen = {}
+        for sql in statements:
+            shape = _shape(sql)
+            if not shape.upper().startswith(('SELECT', 'WITH')) or shape in seen:
+                continue
+            seen[shape] = explain(conn, sql)
+        plans[name] = [{'sql': shape, 'plan': plan} for shape, plan in seen.items()]
+    return plans, timings
+
+
+def load_baseline(path=BASELINE_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='查询计划与接口耗时回归检查')
+    parser.add_argument('--tasks', type=int, default=DEFAULT_TASKS, help='合成任务数')
+    parser.add_argument('--archives', type=int, default=DEFAULT_ARCHIVES, help='合成归档数')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='每个接口的请求次数')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='相对基准变慢超过该比例视为回归（1.0 即慢一倍）')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='基准文件路径')
+    parser.add_argument('--update-baseline', action='store_true', help='用本次结果覆盖基准')
+    args = parser.parse_args(argv)
+
+    print(f"合成看板: {args.tasks} 个任务, {args.archives} 条归档, 每个接口 {args.repeat} 次")
+    plans, timings = run_gate(args.tasks, args.archives, args.repeat)
+    failures = 0
+
+    print("\n查询计划:")
+    for name, entries in plans.items():
+        problems = [(entry, problem) for entry in entries for problem in check_plan(entry['plan'])]
+        print(f"  {'✗' if problems else '✓'} {name}（{len(entries)} 条查询）")
+        for entry, problem in problems:
+            print(f"      {problem}: {entry['sql'][:120]}")
+        failures += len(problems)
+
+    baseline = None if args.update_baseline else load_baseline(args.baseline)
+    if baseline and baseline.get('size') != [args.tasks, args.archives]:
+        print(f"\n基准的看板规模为 {baseline.get('size')}，与本次不同，跳过耗时比较")
+        baseline = None
+
+    print("\n接口耗时（中位数）:")
+    for name, ms in timings.items():
+        base = (baseline or {}).get('timings', {}).get(name)
+        line = f"  {name:<48} {ms:9.3f} ms"
+        if base is not None:
+            regressed = ms > base * (1 + args.threshold) and ms - base > MIN_REGRESSION_MS
+            line += f"  基准 {base:9.3f} ms  {ms / base - 1 if base else 0:+.0%}"
+            if regressed:
+                line += "  ✗ 回归"
+                failures += 1
+        print(line)
+
+    if baseline:
+        changed = [name for name, entries in plans.items()
+                   if baseline.get('plans', {}).get(name) not in (None, entries)]
+        if changed:
+            print("\n与基准相比查询计划有变化（仅提示）:")
+            for name in changed:
+                print(f"  - {name}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'size': [args.tasks, args.archives], 'timings': timings, 'plans': plans},
+                      f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\n✓ 基准已写入 {args.baseline}")
+    elif baseline is None:
+        print(f"\n没有可用的基准，使用 --update-baseline 生成 {args.baseline}")
+
+    print(f"\n{'✗ 发现 ' + str(failures) + ' 个问题' if failures else '✓ 全部通过'}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,30 +11,49 @@ import os
 import subprocess
 from datetime import datetime, timedelta
 
+import metrics
+from models import Task, PRIORITY_LABELS, due_tasks_sql
+
 # 配置
 DATABASE = '/home/pi/.openclaw/workspace/aimier-kanban/data/kanban.db'
 REMINDER_INTERVAL_HOURS = 2  # 每2小时提醒一次
 TASK_TIMEOUT_HOURS = 4  # 任务进行超过4小时提醒
+DUE_SOON_DAYS = 1  # 截止日期在1天内的未完成任务提醒
+
+# 走 idx_tasks_status_updated 索引（perf_gate.py 会检查查询计划）
+IN_PROGRESS_SQL = '''
+    SELECT * FROM tasks 
+    WHERE status = 'in_progress'
+    ORDER BY updated_at ASC
+'''
 
 def get_db():
     """获取数据库连接"""
     # 添加 timeout=10 等待锁释放，避免数据库锁定错误
     conn = sqlite3.connect(DATABASE, timeout=10)
-    conn.row_factory = sqlite3.Row
     return conn
 
 def get_in_progress_tasks():
-    """获取所有进行中的任务"""
+    """获取所有进行中的任务，返回 (Task, started_at) 列表，started_at 为最近一次进入进行中的时间"""
+    conn = get_db()
+    cursor = conn.cursor()
+    metrics.init_metrics_schema(cursor)
+    conn.commit()
+    cursor.execute(IN_PROGRESS_SQL)
+    tasks = [Task.from_row(row) for row in cursor.fetchall()]
+    # 编辑标题等操作会刷新 updated_at，开始时间以流转记录为准
+    result = [(task, metrics.last_entered(cursor, task.id, 'in_progress')) for task in tasks]
+    conn.close()
+    return result
+
+def get_due_tasks(start=None, end=None):
+    """获取截止日期在 [start, end] 内的未完成任务（与看板接口共用 due_tasks_sql）"""
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('''
-        SELECT * FROM tasks 
-        WHERE status = 'in_progress'
-        ORDER BY updated_at ASC
-    ''')
+    cursor.execute(*due_tasks_sql(start, end))
     rows = cursor.fetchall()
     conn.close()
-    return [dict(row) for row in rows]
+    return [Task.from_row(row) for row in rows]
 
 def parse_datetime(dt_str):
     """解析ISO格式时间字符串"""
@@ -91,15 +110,15 @@ def check_and_remind():
     now = datetime.now()
     reminders_sent = 0
     
-    for task in tasks:
-        # 计算任务已进行的时间
-        updated_at = parse_datetime(task.get('updated_at'))
-        if not updated_at:
+    for task, started_at in tasks:
+        # 计算任务已进行的时间（没有流转记录时退回 updated_at）
+        started_at = parse_datetime(started_at or task.updated_at)
+        if not started_at:
             continue
         
-        duration_hours = (now - updated_at).total_seconds() / 3600
+        duration_hours = (now - started_at).total_seconds() / 3600
         
-        print(f"  → 任务: {task['title']}")
+        print(f"  → 任务: {task.title}")
         print(f"    已进行: {format_duration(duration_hours)}")
         
         # 根据任务进行时长发送不同级别的提醒
@@ -110,10 +129,10 @@ def check_and_remind():
 🚨 **任务已进行超过8小时！**
 
 📝 **任务信息：**
-• 标题：{task['title']}
-• 优先级：{'🔴 高' if task['priority'] == 'high' else '🟡 中' if task['priority'] == 'medium' else '🟢 低'}
+• 标题：{task.title}
+• 优先级：{PRIORITY_LABELS.get(task.priority, '🟢 低')}
 • 已进行：{format_duration(duration_hours)}
-• 开始时间：{updated_at.strftime('%Y-%m-%d %H:%M')}
+• 开始时间：{started_at.strftime('%Y-%m-%d %H:%M')}
 
 💡 **建议：**
 1. 如果任务已完成，请在看板中标记为"已完成"
@@ -133,8 +152,8 @@ def check_and_remind():
 📝 **当前任务已进行 {format_duration(duration_hours)}**
 
 📋 **任务详情：**
-• 标题：{task['title']}
-• 优先级：{'🔴 高' if task['priority'] == 'high' else '🟡 中' if task['priority'] == 'medium' else '🟢 低'}
+• 标题：{task.title}
+• 优先级：{PRIORITY_LABELS.get(task.priority, '🟢 低')}
 • 状态：🔄 进行中
 
 💡 **提示：**
@@ -151,9 +170,40 @@ def check_and_remind():
     print(f"  ✓ 检查完成，发送了 {reminders_sent} 条提醒")
     return reminders_sent > 0
 
+def check_due_dates():
+    """检查逾期和即将到期的任务并发送提醒"""
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 检查截止日期...")
+
+    today = datetime.now().date()
+    overdue = get_due_tasks(end=(today - timedelta(days=1)).isoformat())
+    due_soon = get_due_tasks(today.isoformat(), (today + timedelta(days=DUE_SOON_DAYS)).isoformat())
+
+    if not overdue and not due_soon:
+        print("  ✓ 没有逾期或即将到期的任务")
+        return False
+
+    message = f"""📅 **任务截止日期提醒**
+
+⏰ 检查时间：{datetime.now().strftime('%Y-%m-%d %H:%M')}
+"""
+    if overdue:
+        message += f"\n🚨 **已逾期（{len(overdue)}个）：**\n"
+        message += ''.join(f"• {task.title}（截止 {task.due_date}）\n" for task in overdue)
+
+    if due_soon:
+        message += f"\n⏳ **即将到期（{len(due_soon)}个）：**\n"
+        message += ''.join(f"• {task.title}（截止 {task.due_date}）\n" for task in due_soon)
+
+    message += "\n👉 **查看看板：** http://192.168.1.5:5000"
+
+    send_dingtalk_message(message)
+    print(f"  ✓ 逾期 {len(overdue)} 个，即将到期 {len(due_soon)} 个，提醒已发送")
+    return True
+
 if __name__ == '__main__':
     try:
         check_and_remind()
+        check_due_dates()
         exit(0)
     except Exception as e:
         print(f"❌ 执行出错: {e}")
@@ -1,10 +1,38 @@
+// API prefix of the current board ('' for the default board, '/b/<name>' otherwise)
+const API_BASE = window.API_BASE || '';
+
 let tasks = [];
-let archives = [];
 let currentEditingId = null;
-let archiveMonths = new Set();
+let archiveMonths = new Map();
+
+// Board columns
+const COLUMNS = [
+    { status: 'todo', listId: 'todo-list', emptyText: '暂无待办任务' },
+    { status: 'in_progress', listId: 'in-progress-list', emptyText: '暂无进行中任务' },
+    { status: 'done', listId: 'done-list', emptyText: '暂无已完成任务' }
+];
+const COLUMN_WINDOW_SIZE = 50;      // Cards rendered per column before scrolling
+const COLUMN_SCROLL_THRESHOLD = 200; // px from bottom that loads the next window
+const SEARCH_DEBOUNCE_MS = 200;
+const ARCHIVE_PAGE_SIZE = 50;
+
+// Keyed render state: only cards whose content changed are rebuilt
+const cardCache = new Map();    // task id -> { el, sig }
+const columnWindows = {};       // status -> number of cards rendered
+const columnBuckets = {};       // status -> filtered tasks from the last render
+const columnExtras = {};        // status -> { empty, more } placeholder nodes
+let searchTimer = null;
+
+// Archive paging state
+let archiveOffset = 0;
+let archiveHasMore = true;
+let archiveLoading = false;
+let archiveGeneration = 0;
 
 // Load tasks on page load
 document.addEventListener('DOMContentLoaded', () => {
+    initColumns();
+    initArchiveList();
     loadTasks();
     loadStats();
     loadTags();
@@ -13,8 +41,11 @@ document.addEventListener('DOMContentLoaded', () => {
 // Load tasks from API
 async function loadTasks() {
     try {
-        const response = await fetch('/api/tasks');
+        const response = await fetch(`${API_BASE}/api/tasks`);
         tasks = await response.json();
+        tasks.forEach(task => {
+            task._search = `${task.title}\n${task.description || ''}`.toLowerCase();
+        });
         renderTasks();
     } catch (error) {
         console.error('Error loading tasks:', error);
@@ -24,7 +55,7 @@ async function loadTasks() {
 // Load statistics
 async function loadStats() {
     try {
-        const response = await fetch('/api/stats');
+        const response = await fetch(`${API_BASE}/api/stats`);
         const stats = await response.json();
         document.getElementById('stat-total').textContent = stats.total;
         document.getElementById('stat-todo').textContent = stats.todo;
@@ -55,7 +86,7 @@ async function loadStats() {
 // Load tags from API
 async function loadTags() {
     try {
-        const response = await fetch('/api/tags');
+        const response = await fetch(`${API_BASE}/api/tags`);
         const tags = await response.json();
         const select = document.getElementById('tag-filter');
 
@@ -76,30 +107,124 @@ async function loadTags() {
     }
 }
 
+// Set up column windows and load more cards on scroll
+function initColumns() {
+    COLUMNS.forEach(column => {
+        columnWindows[column.status] = COLUMN_WINDOW_SIZE;
+        const list = document.getElementById(column.listId);
+        list.addEventListener('scroll', () => {
+            const bucket = columnBuckets[column.status] || [];
+            if (columnWindows[column.status] >= bucket.length) return;
+            if (list.scrollTop + list.clientHeight < list.scrollHeight - COLUMN_SCROLL_THRESHOLD) return;
+            columnWindows[column.status] += COLUMN_WINDOW_SIZE;
+            renderColumn(column);
+        });
+    });
+}
+
+// Reset column windows (e.g. when filters change)
+function resetColumnWindows() {
+    COLUMNS.forEach(column => {
+        columnWindows[column.status] = COLUMN_WINDOW_SIZE;
+        document.getElementById(column.listId).scrollTop = 0;
+    });
+}
+
+// Check whether a task matches the current search and filters
+function matchesFilters(task, query, priority, tag) {
+    if (query && !task._search.includes(query)) return false;
+    if (priority && task.priority !== priority) return false;
+    if (tag && !(task.tags && task.tags.includes(tag))) return false;
+    return true;
+}
+
 // Render tasks to columns
-function renderTasks(filteredTasks = null) {
-    const tasksToRender = filteredTasks || tasks;
-    
-    const todoList = document.getElementById('todo-list');
-    const inProgressList = document.getElementById('in-progress-list');
-    const doneList = document.getElementById('done-list');
-    
-    todoList.innerHTML = '';
-    inProgressList.innerHTML = '';
-    doneList.innerHTML = '';
-    
-    const todoTasks = tasksToRender.filter(t => t.status === 'todo');
-    const inProgressTasks = tasksToRender.filter(t => t.status === 'in_progress');
-    const doneTasks = tasksToRender.filter(t => t.status === 'done');
-    
-    todoTasks.forEach(task => todoList.appendChild(createTaskCard(task)));
-    inProgressTasks.forEach(task => inProgressList.appendChild(createTaskCard(task)));
-    doneTasks.forEach(task => doneList.appendChild(createTaskCard(task)));
-    
-    // Add empty state if no tasks
-    if (todoTasks.length === 0) todoList.appendChild(createEmptyState('暂无待办任务'));
-    if (inProgressTasks.length === 0) inProgressList.appendChild(createEmptyState('暂无进行中任务'));
-    if (doneTasks.length === 0) doneList.appendChild(createEmptyState('暂无已完成任务'));
+function renderTasks() {
+    const query = document.getElementById('search-input').value.toLowerCase();
+    const priority = document.getElementById('priority-filter').value;
+    const tag = document.getElementById('tag-filter').value;
+
+    // Bucket tasks by status in a single pass
+    COLUMNS.forEach(column => { columnBuckets[column.status] = []; });
+    tasks.forEach(task => {
+        const bucket = columnBuckets[task.status];
+        if (bucket && matchesFilters(task, query, priority, tag)) {
+            bucket.push(task);
+        }
+    });
+
+    const rendered = new Set();
+    COLUMNS.forEach(column => renderColumn(column, rendered));
+
+    // Drop cached cards that are no longer on the board
+    cardCache.forEach((entry, id) => {
+        if (!rendered.has(id)) {
+            entry.el.remove();
+            cardCache.delete(id);
+        }
+    });
+}
+
+// Render the visible window of a column, reusing unchanged cards
+function renderColumn(column, rendered = null) {
+    const list = document.getElementById(column.listId);
+    const bucket = columnBuckets[column.status] || [];
+    const visibleCount = Math.min(bucket.length, columnWindows[column.status]);
+    const extras = columnExtras[column.status];
+    const nodes = [];
+
+    for (let i = 0; i < visibleCount; i++) {
+        const task = bucket[i];
+        nodes.push(getTaskCard(task));
+        if (rendered) rendered.add(task.id);
+    }
+
+    if (bucket.length === 0) {
+        nodes.push(extras.empty);
+    } else if (visibleCount < bucket.length) {
+        extras.more.textContent = `还有 ${bucket.length - visibleCount} 个任务，向下滚动加载`;
+        nodes.push(extras.more);
+    }
+
+    patchChildren(list, nodes);
+}
+
+// Return the cached card for a task, rebuilding it only if its content changed
+function getTaskCard(task) {
+    const sig = [
+        task.title,
+        task.description,
+        task.priority,
+        task.due_date,
+        (task.tags || []).join('\u0001')
+    ].join('\u0000');
+
+    const cached = cardCache.get(task.id);
+    if (cached && cached.sig === sig) {
+        return cached.el;
+    }
+
+    const el = createTaskCard(task);
+    if (cached) cached.el.remove();
+    cardCache.set(task.id, { el, sig });
+    return el;
+}
+
+// Make parent's children exactly match nodes, moving only what is out of place
+function patchChildren(parent, nodes) {
+    let ref = parent.firstChild;
+    nodes.forEach(node => {
+        if (node === ref) {
+            ref = ref.nextSibling;
+        } else {
+            parent.insertBefore(node, ref);
+        }
+    });
+    while (ref) {
+        const next = ref.nextSibling;
+        parent.removeChild(ref);
+        ref = next;
+    }
 }
 
 // Create task card element
@@ -142,6 +267,13 @@ function createTaskCard(task) {
     return card;
 }
 
+// Create "load more" hint element
+function createMoreIndicator() {
+    const div = document.createElement('div');
+    div.className = 'list-more';
+    return div;
+}
+
 // Create empty state element
 function createEmptyState(message) {
     const div = document.createElement('div');
@@ -170,19 +302,23 @@ function drop(e, status) {
 }
 
 // Remove drag-over class when leaving
-['todo-list', 'in-progress-list', 'done-list'].forEach(id => {
-    const list = document.getElementById(id);
+COLUMNS.forEach(column => {
+    const list = document.getElementById(column.listId);
     if (list) {
         list.addEventListener('dragleave', () => {
             list.classList.remove('drag-over');
         });
     }
+    columnExtras[column.status] = {
+        empty: createEmptyState(column.emptyText),
+        more: createMoreIndicator()
+    };
 });
 
 // Update task status
 async function updateTaskStatus(taskId, status) {
     try {
-        const response = await fetch(`/api/tasks/${taskId}/status`, {
+        const response = await fetch(`${API_BASE}/api/tasks/${taskId}/status`, {
             method: 'PATCH',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ status })
@@ -261,14 +397,14 @@ async function saveTask(e) {
     try {
         let response;
         if (currentEditingId) {
-            response = await fetch(`/api/tasks/${currentEditingId}`, {
+            response = await fetch(`${API_BASE}/api/tasks/${currentEditingId}`, {
                 method: 'PUT',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(taskData)
             });
         } else {
             taskData.status = 'todo';
-            response = await fetch('/api/tasks', {
+            response = await fetch(`${API_BASE}/api/tasks`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(taskData)
@@ -296,7 +432,7 @@ async function deleteTask(taskId) {
     if (!confirm('确定要删除这个任务吗？')) return;
 
     try {
-        const response = await fetch(`/api/tasks/${taskId}`, {
+        const response = await fetch(`${API_BASE}/api/tasks/${taskId}`, {
             method: 'DELETE'
         });
 
@@ -310,44 +446,20 @@ async function deleteTask(taskId) {
     }
 }
 
-// Search tasks
+// Search tasks (debounced so typing does not re-render on every keystroke)
 function searchTasks() {
-    const query = document.getElementById('search-input').value.toLowerCase();
-    const priority = document.getElementById('priority-filter').value;
-    const tag = document.getElementById('tag-filter').value;
-
-    filterAndRender(query, priority, tag);
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => {
+        resetColumnWindows();
+        renderTasks();
+    }, SEARCH_DEBOUNCE_MS);
 }
 
 // Filter tasks
 function filterTasks() {
-    const query = document.getElementById('search-input').value.toLowerCase();
-    const priority = document.getElementById('priority-filter').value;
-    const tag = document.getElementById('tag-filter').value;
-
-    filterAndRender(query, priority, tag);
-}
-
-// Filter and render
-function filterAndRender(query, priority, tag) {
-    let filtered = tasks;
-
-    if (query) {
-        filtered = filtered.filter(t =>
-            t.title.toLowerCase().includes(query) ||
-            (t.description && t.description.toLowerCase().includes(query))
-        );
-    }
-
-    if (priority) {
-        filtered = filtered.filter(t => t.priority === priority);
-    }
-
-    if (tag) {
-        filtered = filtered.filter(t => t.tags && t.tags.includes(tag));
-    }
-
-    renderTasks(filtered);
+    clearTimeout(searchTimer);
+    resetColumnWindows();
+    renderTasks();
 }
 
 // Archive Modal Functions
@@ -362,24 +474,68 @@ function closeArchiveModal() {
     modal.classList.remove('active');
 }
 
+// Load more archives when scrolled near the bottom
+function initArchiveList() {
+    const list = document.getElementById('archive-list');
+    list.addEventListener('scroll', () => {
+        if (list.scrollTop + list.clientHeight >= list.scrollHeight - COLUMN_SCROLL_THRESHOLD) {
+            loadArchivePage();
+        }
+    });
+}
+
 // Load archives from API
 async function loadArchives() {
+    resetArchiveList();
+    await Promise.all([loadArchiveMonths(), loadArchivePage()]);
+}
+
+// Clear loaded archive pages
+function resetArchiveList() {
+    archiveGeneration++;
+    archiveOffset = 0;
+    archiveHasMore = true;
+    archiveLoading = false;
+    const list = document.getElementById('archive-list');
+    list.innerHTML = '';
+    list.scrollTop = 0;
+}
+
+// Load archive months and their counts
+async function loadArchiveMonths() {
     try {
-        const response = await fetch('/api/archives');
-        archives = await response.json();
-        
-        // Extract unique months
-        archiveMonths = new Set();
-        archives.forEach(archive => {
-            if (archive.archived_month) {
-                archiveMonths.add(archive.archived_month);
-            }
-        });
-        
+        const response = await fetch(`${API_BASE}/api/archives/months`);
+        const months = await response.json();
+        archiveMonths = new Map(months.map(m => [m.month, m.count]));
         updateArchiveMonthFilter();
-        renderArchives();
+    } catch (error) {
+        console.error('Error loading archive months:', error);
+    }
+}
+
+// Load the next page of archives from the server
+async function loadArchivePage() {
+    if (archiveLoading || !archiveHasMore) return;
+    archiveLoading = true;
+    const generation = archiveGeneration;
+
+    const params = new URLSearchParams({ limit: ARCHIVE_PAGE_SIZE, offset: archiveOffset });
+    const month = document.getElementById('archive-month-filter').value;
+    if (month) params.set('month', month);
+
+    try {
+        const response = await fetch(`${API_BASE}/api/archives?${params}`);
+        const page = await response.json();
+        // Ignore pages requested before the filter changed
+        if (generation !== archiveGeneration) return;
+
+        archiveOffset += page.length;
+        archiveHasMore = page.length === ARCHIVE_PAGE_SIZE;
+        renderArchives(page);
     } catch (error) {
         console.error('Error loading archives:', error);
+    } finally {
+        if (generation === archiveGeneration) archiveLoading = false;
     }
 }
 
@@ -393,12 +549,11 @@ function updateArchiveMonthFilter() {
         select.remove(1);
     }
     
-    // Add month options sorted descending
-    const sortedMonths = Array.from(archiveMonths).sort().reverse();
-    sortedMonths.forEach(month => {
+    // Months come from the server sorted descending
+    archiveMonths.forEach((count, month) => {
         const option = document.createElement('option');
         option.value = month;
-        option.textContent = formatMonth(month);
+        option.textContent = `${formatMonth(month)} (${count})`;
         select.appendChild(option);
     });
     
@@ -414,21 +569,41 @@ function formatMonth(monthStr) {
     return `${year}年${month}月`;
 }
 
-// Render archived tasks
-function renderArchives(filteredArchives = null) {
+// Append a page of archived tasks
+function renderArchives(page) {
     const list = document.getElementById('archive-list');
-    const archivesToRender = filteredArchives || archives;
-    
-    list.innerHTML = '';
     
-    if (archivesToRender.length === 0) {
+    if (archiveOffset === 0 && page.length === 0) {
+        list.innerHTML = '';
         list.appendChild(createEmptyState('暂无归档任务'));
         return;
     }
     
-    archivesToRender.forEach(archive => {
-        list.appendChild(createArchiveCard(archive));
+    const fragment = document.createDocumentFragment();
+    page.forEach(archive => {
+        fragment.appendChild(createArchiveCard(archive));
     });
+    list.appendChild(fragment);
+
+    // Keep loading if the first pages do not fill the list yet
+    if (archiveHasMore && list.scrollHeight <= list.clientHeight) {
+        loadArchivePage();
+    }
+}
+
+// Remove an archive card after restore/delete
+function removeArchiveCard(taskId) {
+    const list = document.getElementById('archive-list');
+    const card = list.querySelector(`.archive-card[data-id="${CSS.escape(taskId)}"]`);
+    if (card) {
+        card.remove();
+        // The server-side list shrank by one, keep the next page aligned
+        archiveOffset = Math.max(0, archiveOffset - 1);
+    }
+    if (!list.querySelector('.archive-card') && !archiveHasMore) {
+        list.innerHTML = '';
+        list.appendChild(createEmptyState('暂无归档任务'));
+    }
 }
 
 // Create archive card element
@@ -461,27 +636,19 @@ function createArchiveCard(archive) {
 
 // Filter archives by month
 function filterArchives() {
-    const month = document.getElementById('archive-month-filter').value;
-    
-    if (month) {
-        const filtered = archives.filter(a => a.archived_month === month);
-        renderArchives(filtered);
-    } else {
-        renderArchives();
-    }
+    resetArchiveList();
+    loadArchivePage();
 }
 
 // Restore task from archive
 async function restoreTask(taskId) {
     try {
-        const response = await fetch(`/api/archives/${taskId}/restore`, {
+        const response = await fetch(`${API_BASE}/api/archives/${taskId}/restore`, {
             method: 'POST'
         });
         
         if (response.ok) {
-            // Remove from archives list
-            archives = archives.filter(a => a.id !== taskId);
-            renderArchives();
+            removeArchiveCard(taskId);
             
             // Refresh main tasks and stats
             await loadTasks();
@@ -500,14 +667,12 @@ async function deleteArchivedTask(taskId) {
     if (!confirm('确定要永久删除这个归档任务吗？此操作无法撤销。')) return;
     
     try {
-        const response = await fetch(`/api/archives/${taskId}`, {
+        const response = await fetch(`${API_BASE}/api/archives/${taskId}`, {
             method: 'DELETE'
         });
         
         if (response.ok) {
-            // Remove from archives list
-            archives = archives.filter(a => a.id !== taskId);
-            renderArchives();
+            removeArchiveCard(taskId);
             await loadStats();
             
             alert('归档任务已永久删除');
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+单写线程
+进程内所有写操作提交到同一个线程执行。写线程把几毫秒内到达的操作合并到一个事务中
+（group commit），每个操作放在独立的 SAVEPOINT 里，失败只回滚自己；
+事务提交后再通知各调用方的 Future。
+批次中出现意外错误时只让该批的 Future 失败并重新建立连接，写线程继续运行。
+"""
+
+import bisect
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# 直方图分桶上界（毫秒 / 操作数），最后一个桶没有上界
+WAIT_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+WRITE_TIMEOUT = 30  # run() 等待写操作完成的最长时间（秒）
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_dict(self):
+        count = sum(self.counts)
+        labels = [f'<={b}' for b in self.bounds] + [f'>{self.bounds[-1]}']
+        return {
+            'count': count,
+            'avg': round(self.total / count, 3) if count else None,
+            'max': round(self.max, 3),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class DbWriter:
+    def __init__(self, connect, on_commit=None, batch_window=0.002, max_batch=64):
+        """
+        connect: 返回数据库连接的函数，写线程独占该连接
+        on_commit: 每次事务提交后调用（例如让读缓存失效）
+        batch_window: 收到第一个操作后继续等待合并的时间（秒）
+        """
+        self._connect = connect
+        self._on_commit = on_commit
+        self._batch_window = batch_window
+        self._max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._lock_wait = Histogram(WAIT_BUCKETS_MS)
+        self._queue_wait = Histogram(WAIT_BUCKETS_MS)
+        self._batch_size = Histogram(BATCH_BUCKETS)
+        self._commits = 0
+        self._failed_batches = 0
+        self._callback_errors = 0
+
+    def _ensure_started(self):
+        # 首次使用时再启动线程，避免 fork 前创建线程；线程意外退出后重新启动
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, fn, *args):
+        """提交写操作 fn(conn, *args)，返回 Future"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((future, fn, args, time.perf_counter()))
+        return future
+
+    def run(self, fn, *args, timeout=WRITE_TIMEOUT):
+        """
+        提交写操作并等待提交完成，返回 fn 的返回值
+        超时抛出 concurrent.futures.TimeoutError（尚未开始执行的操作会被取消）
+        """
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def close(self):
+        """处理完已提交的操作后停止写线程"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _loop(self):
+        conn = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                stop = False
+                deadline = time.perf_counter() + self._batch_window
+                while len(batch) < self._max_batch:
+                    timeout = deadline - time.perf_counter()
+                    try:
+                        item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                        conn.isolation_level = None  # 由写线程显式控制事务
+                    self._run_batch(conn, batch)
+                except Exception as e:
+                    # 连接失败或 SAVEPOINT/ROLLBACK 等出错：让本批失败，丢弃连接，下一批重新连接
+                    self._fail_batch(batch, e)
+                    conn = self._discard(conn)
+                if stop:
+                    break
+        finally:
+            self._discard(conn)
+            with self._start_lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _fail_batch(self, batch, error):
+        for future, _, _, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+        with self._stats_lock:
+            self._failed_batches += 1
+
+    @staticmethod
+    def _discard(conn):
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        return None
+
+    def _run_batch(self, conn, batch):
+        batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+        except Exception as e:
+            for future, _, _, _ in batch:
+                future.set_exception(e)
+            with self._stats_lock:
+                self._failed_batches += 1
+            return
+        locked = time.perf_counter()
+
+        done = []
+        for future, fn, args, submitted in batch:
+            conn.execute('SAVEPOINT op')
+            try:
+                result = fn(conn, *args)
+            except Exception as e:
+                conn.execute('ROLLBACK TO op')
+                conn.execute('RELEASE op')
+                future.set_exception(e)
+                continue
+            conn.execute('RELEASE op')
+            done.append((future, result))
+
+        try:
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for future, _ in done:
+                future.set_exception(e)
+            with self._stats_lock:
+                self._failed_batches += 1
+            return
+
+        if self._on_commit:
+            # 事务已经提交，回调失败不能再让这批写操作报错
+            try:
+                self._on_commit()
+            except Exception as e:
+                print(f"[WARN] 写线程提交回调失败: {e!r}")
+                with self._stats_lock:
+                    self._callback_errors += 1
+
+        with self._stats_lock:
+            self._commits += 1
+            self._lock_wait.add((locked - started) * 1000)
+            self._batch_size.add(len(batch))
+            for _, _, _, submitted in batch:
+                self._queue_wait.add((started - submitted) * 1000)
+
+        for future, result in done:
+            future.set_result(result)
+
+    def stats(self):
+        """锁等待、排队等待和批大小直方图"""
+        with self._stats_lock:
+            return {
+                'commits': self._commits,
+                'failed_batches': self._failed_batches,
+                'callback_errors': self._callback_errors,
+                'pending': self._queue.qsize(),
+                'lock_wait_ms': self._lock_wait.to_dict(),
+                'queue_wait_ms': self._queue_wait.to_dict(),
+                'batch_size': self._batch_size.to_dict(),
+            }